@@ -1,19 +1,70 @@
 from autohack import __VERSION__
+from autohack.core.archive import *
+from autohack.core.batch import *
 from autohack.core.checker import *
+from autohack.core.cache import *
 from autohack.core.constant import *
+from autohack.core.dedup import *
 from autohack.core.exception import *
+from autohack.core.ledger import *
+from autohack.core.leaderboard import *
+from autohack.core.metrics import *
+from autohack.core.minimize import *
+from autohack.core.render import *
+from autohack.core.results import *
 from autohack.core.path import *
 from autohack.core.util import *
 from autohack.core.run import *
+from autohack.core.pool import *
 from autohack.lib.config import *
 from autohack.lib.logger import *
 from autohack.lib.i18n import *
-import traceback, argparse, colorama, logging, time, uuid, os
+from typing import Iterator, cast
+import concurrent.futures, contextlib, traceback, threading, argparse, hashlib, logging, atexit, pathlib, random, shutil, json, time, uuid, sys, os
 
 CLIENT_ID = str(uuid.uuid4())
 LOG_TIME = time.localtime()
 
 
+def getSessionFolderPath(session: str) -> pathlib.Path:
+    sessionFolderPath = pathlib.Path(session)
+    return sessionFolderPath if sessionFolderPath.is_dir() else HACK_DATA_STORAGE_FOLDER_PATH / session
+
+
+def readSavedInput(session: str, dataID: int, config: Config) -> bytes | None:
+    """Input of an error data of a session, from its archive or its files."""
+    sessionFolderPath = getSessionFolderPath(session)
+    if hasArchive(sessionFolderPath):
+        archive = HackDataArchive(sessionFolderPath)
+        records = [record for record in archive.records() if record.dataID == dataID and record.kind == "input"]
+        return next((content for _, content in archive.read(records)), None)
+    try:
+        return readData(getHackDataFilePath(sessionFolderPath, dataID, config.getConfigEntry("paths.input")))
+    except OSError:
+        return None
+
+
+def exportArchive(session: str, dataIDs: list[str], config: Config, I18n: I18N, logger: logging.Logger) -> None:
+    sessionFolderPath = getSessionFolderPath(session)
+    if not hasArchive(sessionFolderPath):
+        writeMessage(I18n, "__main__.export.not-found", sessionFolderPath, endl=1, highlight=True)
+        exitProgram(1)
+    archive = HackDataArchive(sessionFolderPath)
+    records = list(archive.records())
+    if len(dataIDs) > 0:
+        selectedIDs = {int(dataID) for dataID in dataIDs}
+        missingIDs = selectedIDs - {record.dataID for record in records}
+        if missingIDs:
+            writeMessage(I18n, "__main__.export.missing", ", ".join(map(str, sorted(missingIDs))), endl=1, highlight=True)
+        records = [record for record in records if record.dataID in selectedIDs]
+    exportFolderPath = getExportFolderPath(LOG_TIME, CLIENT_ID)
+    for record, content in archive.read(records):
+        writeData(getHackDataFilePath(exportFolderPath, record.dataID, config.getConfigEntry(f"paths.{record.kind}")), content)
+    exportedCount = len({record.dataID for record in records})
+    logger.info(f"[autohack] {exportedCount} archived data of {sessionFolderPath} exported to {exportFolderPath}.")
+    writeMessage(I18n, "__main__.export.finish", exportedCount, exportFolderPath, endl=1)
+
+
 def main() -> None:
     global CLIENT_ID, LOG_TIME
 
@@ -21,16 +72,52 @@ def main() -> None:
     argsParser.add_argument("--version", "-V", action="store_true", help="Show version information")
     argsParser.add_argument("--debug", action="store_true", help="Enable debug mode with DEBUG logging level")
     argsParser.add_argument("--reset-global-config", action="store_true", help="Reset the global config file")
+    argsParser.add_argument("--regenerate", type=int, metavar="SEED", help="Generate the input and answer for a seed into the export folder and exit")
+    argsParser.add_argument(
+        "--jobs", "-j", type=int, metavar="N", help="Number of data processed at the same time (overrides the workers config entry)"
+    )
+    argsParser.add_argument(
+        "--export",
+        nargs="+",
+        metavar=("SESSION", "ID"),
+        help="Write archived error data of a datastorage session (all of them if no IDs are given) to the export folder and exit",
+    )
+    argsParser.add_argument(
+        "--minimize",
+        nargs=2,
+        metavar=("SESSION", "ID"),
+        help="Shrink the input of an error data saved in a datastorage session while it still fails the same way, write it to the export folder and exit",
+    )
+    argsParser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Run unattended: no countdown, language menu or live status, messages go to stderr and results to stdout as JSON lines",
+    )
+    argsParser.add_argument(
+        "--results", metavar="FILE", help="Write a JSON object per judged data and per failure to FILE, '-' for stdout (the default in headless mode)"
+    )
     # TODO: 添加一个参数用于清除过往数据
 
     args = argsParser.parse_args()
+    if args.export is not None and not all(dataID.isdigit() for dataID in args.export[1:]):
+        argsParser.error("argument --export: IDs must be numbers")
+    if args.minimize is not None and not args.minimize[1].isdigit():
+        argsParser.error("argument --minimize: ID must be a number")
 
     if args.version:
         write(f"{__VERSION__}")
         exitProgram(0, True)
 
+    setHeadless(args.headless)
     hideCursor()
 
+    resultsFile = None
+    if args.results == "-" or (args.results is None and args.headless):
+        resultsFile = sys.stdout
+    elif args.results is not None:
+        resultsFile = open(args.results, "w", encoding="utf-8")
+    results = ResultStream(resultsFile)
+
     if args.reset_global_config and GLOBAL_CONFIG_FILE_PATH.exists():
         os.remove(GLOBAL_CONFIG_FILE_PATH)
 
@@ -43,10 +130,11 @@ def main() -> None:
     loggerObj = Logger(LOG_FOLDER_PATH, logging.DEBUG if args.debug else logging.INFO, LOG_TIME)
     logger = loggerObj.getLogger()
 
-    I18n = I18N(TRANSLATION_FOLDER_PATH, logger)
+    I18n = I18N(TRANSLATION_FOLDER_PATH, logger, PARSE_CACHE_FOLDER_PATH)
     _ = I18n.translate
 
-    if not GLOBAL_CONFIG_FILE_PATH.exists():
+    # Headless runs take the default language instead of asking.
+    if not GLOBAL_CONFIG_FILE_PATH.exists() and not args.headless:
         logger.info("[autohack] Global config file not found. Creating new one.")
         write("Welcome to autohack-next!", 1)
         write("A global config file will be created.", 1)
@@ -61,11 +149,9 @@ def main() -> None:
         #         break
         #     write("Invalid input. Please enter a valid number.")
         #     prevLine()
-        selectedLangIndex = selectionMenu(
-            [f"{langID} / {I18N(TRANSLATION_FOLDER_PATH, logger).translate("language-info", langID)}" for i, langID in enumerate(LANGUAGE_MAPS)]
-        )
+        selectedLangIndex = selectionMenu([f"{langID} / {I18n.translate("language-info", langID)}" for i, langID in enumerate(LANGUAGE_MAPS)])
         selectedLang = LANGUAGE_MAPS[selectedLangIndex]
-        globalConfig = Config(GLOBAL_CONFIG_FILE_PATH, DEFAULT_GLOBAL_CONFIG, logger)
+        globalConfig = Config(GLOBAL_CONFIG_FILE_PATH, DEFAULT_GLOBAL_CONFIG, logger, cacheFolderPath=PARSE_CACHE_FOLDER_PATH)
         globalConfig.modifyConfigEntry("language", selectedLang)
         I18n.setDefaultLanguage(selectedLang)
         clearLine()
@@ -76,13 +162,22 @@ def main() -> None:
         writeMessage(I18n, "__main__.language-select.result", _("language-info"), endl=1)
         writeMessage(I18n, "__main__.language-select.info", GLOBAL_CONFIG_FILE_PATH, endl=2)
 
-    globalConfig = Config(GLOBAL_CONFIG_FILE_PATH, DEFAULT_GLOBAL_CONFIG, logger)
+    globalConfig = Config(GLOBAL_CONFIG_FILE_PATH, DEFAULT_GLOBAL_CONFIG, logger, cacheFolderPath=PARSE_CACHE_FOLDER_PATH)
     I18n.setDefaultLanguage(globalConfig.getConfigEntry("language"))
 
     config = Config(
-        CONFIG_FILE_PATH, DEFAULT_CONFIG, logger, CONFIG_VALIDATION_EXCLUDE, getTranslatedMessage(I18n, "__main__.config-created", CONFIG_FILE_PATH)
+        CONFIG_FILE_PATH,
+        DEFAULT_CONFIG,
+        logger,
+        CONFIG_VALIDATION_EXCLUDE,
+        getTranslatedMessage(I18n, "__main__.config-created", CONFIG_FILE_PATH),
+        PARSE_CACHE_FOLDER_PATH,
     )
 
+    if args.export is not None:
+        exportArchive(args.export[0], args.export[1:], config, I18n, logger)
+        exitProgram(0)
+
     logger.info(f'[autohack] Data folder path: "{DATA_FOLDER_PATH}"')
     logger.info(f"[autohack] Client ID: {CLIENT_ID}")
     logger.info(f"[autohack] Initialized. Version: {__VERSION__}")
@@ -92,7 +187,7 @@ def main() -> None:
     writeMessage(I18n, "__main__.start.export", getExportFolderPath(LOG_TIME, CLIENT_ID), endl=1)
     writeMessage(I18n, "__main__.start.checker", CHECKER_FOLDER_PATH, endl=2)
 
-    waitTimeBeforeStart = globalConfig.getConfigEntry("wait_time_before_start")
+    waitTimeBeforeStart = 0 if args.headless else globalConfig.getConfigEntry("wait_time_before_start")
     for i in range(waitTimeBeforeStart, 0, -1):
         writeMessage(I18n, "__main__.countdown", i, clear=True)
         time.sleep(1)
@@ -102,21 +197,48 @@ def main() -> None:
         [config.getConfigEntry("commands.compile.std"), "__main__.compile.filename.std"],
         [config.getConfigEntry("commands.compile.generator"), "__main__.compile.filename.generator"],
     ]
-    for file in fileList:
+    compileFunc = compileCodeCached if config.getConfigEntry("compile_cache") else compileCode
+    # All targets are built at the same time. Their results are reported in order.
+    compileExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=len(fileList))
+    compileFutures = [compileExecutor.submit(compileFunc, file[0]) for file in fileList]
+    compileExecutor.shutdown(wait=False)
+    for file, compileFuture in zip(fileList, compileFutures):
         writeMessage(I18n, "__main__.compile.doing", _(file[1]), clear=True)
         try:
-            compileCode(file[0])
+            if compileFuture.result():
+                logger.debug(f"[autohack] {_(file[1], LOGGER_LANGUAGE_ID).capitalize()} is up to date. Cached binary reused.")
+                continue
         except autohackRuntimeError as e:
             logger.error(
                 f"[autohack] {_(file[1], LOGGER_LANGUAGE_ID).capitalize()} compilation failed with return code {e.returnCode} and message:\n{e.output.decode(errors="ignore")}"
             )
             writeMessage(I18n, "__main__.compile.error", _(file[1]).capitalize(), e.returnCode, endl=2, clear=True, highlight=True)
             write(e.output.decode(errors="ignore"))
+            results.emit(
+                "failure", stage="compile", target=file[1].rsplit(".", 1)[-1], return_code=e.returnCode, output=e.output.decode(errors="ignore")
+            )
             exitProgram(1)
         else:
             logger.debug(f"[autohack] {_(file[1], LOGGER_LANGUAGE_ID).capitalize()} compiled successfully.")
     writeMessage(I18n, "__main__.compile.finish", endl=1, clear=True)
 
+    if args.regenerate is not None:
+        exportFolderPath = getExportFolderPath(LOG_TIME, CLIENT_ID)
+        try:
+            dataInput = generateInput(fillSeed(config.getConfigEntry("commands.run.generator"), args.regenerate))
+            if config.getConfigEntry("batch.size") > 1:
+                dataInput = buildBatchInput(config.getConfigEntry("batch.header"), [dataInput])
+            writeData(getExportDataPath(exportFolderPath, "input"), dataInput)
+            writeMessage(I18n, "__main__.main.save-input-data", getExportDataPath(exportFolderPath, "input"), endl=1)
+            dataAnswer = generateAnswer(config.getConfigEntry("commands.run.std"), dataInput)
+            writeData(getExportDataPath(exportFolderPath, "answer"), dataAnswer)
+            writeMessage(I18n, "__main__.main.save-answer-data", getExportDataPath(exportFolderPath, "answer"), endl=1)
+        except autohackRuntimeError as e:
+            writeMessage(I18n, "__main__.regenerate.failed", args.regenerate, e.returnCode, endl=1, highlight=True)
+            exitProgram(1)
+        logger.info(f"[autohack] Data for seed {args.regenerate} regenerated.")
+        exitProgram(0)
+
     writeMessage(I18n, "__main__.activate-checker.doing", config.getConfigEntry("checker.name"))
     currentChecker: checkerType = lambda l, o, a, ar: (False, _("__main__.activate-checker.no-checker-message"))
     deactivateFunc: deactivateType = emptyDeactivate
@@ -127,12 +249,17 @@ def main() -> None:
     except Exception as e:
         logger.critical(f"[autohack] {e}")
         writeMessage(I18n, "__main__.activate-checker.failed", endl=1, clear=True, highlight=True)
+        results.emit("failure", stage="checker", message=str(e))
         traceback.print_exc()
         exitProgram(1)
     writeMessage(I18n, "__main__.activate-checker.finish", config.getConfigEntry("checker.name"), endl=2, clear=True)
 
-    dataCount, errorDataCount = 0, 0
-    lastStatusError = False
+    # dataCount counts judged data only, so duplicate data do not count towards the throughput.
+    dataCount, errorDataCount, duplicateDataCount = 0, 0, 0
+    # Bytes of error data written by this session, for the storage ledger.
+    savedDataSize = 0
+    # Highest data ID committed so far, for the progress in the status.
+    progressDataID = 0
     generateCommand = config.getConfigEntry("commands.run.generator")
     stdCommand = config.getConfigEntry("commands.run.std")
     sourceCommand = config.getConfigEntry("commands.run.source")
@@ -141,151 +268,640 @@ def main() -> None:
     inputFilePath = config.getConfigEntry("paths.input")
     answerFilePath = config.getConfigEntry("paths.answer")
     outputFilePath = config.getConfigEntry("paths.output")
+    seedFilePath = config.getConfigEntry("paths.seed")
     maximumDataLimit = config.getConfigEntry("maximum_number_of_data")
     errorDataLimit = config.getConfigEntry("error_data_number_limit")
-    refreshSpeed = globalConfig.getConfigEntry("refresh_speed")
+    refreshRate = globalConfig.getConfigEntry("refresh_rate")
     checkerArgs = config.getConfigEntry("checker.args")
+    workerCount = args.jobs if args.jobs is not None else config.getConfigEntry("workers")
+    batchSize = max(1, config.getConfigEntry("batch.size"))
+    performanceEnabled = config.getConfigEntry("performance.enabled")
+    # A data in a batch only gets an equal share of the batch's time, which cannot be ranked against the real time of data
+    # judged alone, so the performance mode turns batching off.
+    if performanceEnabled and batchSize > 1:
+        logger.warning(f"[autohack] Batching turned off for the performance mode, batch.size was {batchSize}.")
+        writeMessage(I18n, "__main__.start.batching-off", batchSize, endl=1, highlight=True)
+        batchSize = 1
+    batchHeader = config.getConfigEntry("batch.header")
+    batchOutputLines = config.getConfigEntry("batch.output_lines")
+    batchOutputSeparator = config.getConfigEntry("batch.output_separator")
+    batching = batchSize > 1
+    # Batches are built in memory, so batching turns streaming off.
+    streaming = config.getConfigEntry("streaming") and not batching
+    seeded = any(isinstance(arg, str) and "$(seed)" in arg for arg in generateCommand)
+    seedStart = config.getConfigEntry("seed.start") or random.randrange(1, SEED_LIMIT // 2)
+    seedStep = config.getConfigEntry("seed.step")
+    if seeded:
+        logger.info(f"[autohack] Seeds start at {seedStart} with step {seedStep}.")
+        writeMessage(I18n, "__main__.start.seed", seedStart, seedStep, endl=2)
+    duplicateFilter = None
+    if config.getConfigEntry("deduplicate.enabled"):
+        duplicateFilter = DuplicateFilter(config.getConfigEntry("deduplicate.memory") * 1024 * 1024)
+    answerCache = None
+    if config.getConfigEntry("answer_cache.enabled"):
+        answerCache = AnswerCache(ANSWER_CACHE_FOLDER_PATH, stdCommand, config.getConfigEntry("answer_cache.max_size") * 1024 * 1024)
+
+    archive = None
+    if config.getConfigEntry("archive.enabled"):
+        archive = HackDataArchive(getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME), config.getConfigEntry("archive.compression"))
+
+    # The slowest data by CPU time in seconds and the heaviest data by peak memory in bytes, saved even when they pass.
+    leaderboards = {"time": Leaderboard(config.getConfigEntry("performance.keep")), "memory": Leaderboard(config.getConfigEntry("performance.keep"))}
+    leaderboardDataSizes: dict[tuple[str, int], int] = {}
+
+    metrics = HackMetrics(CLIENT_ID)
+    metricsEnabled = config.getConfigEntry("metrics.enabled")
+    metricsInterval = config.getConfigEntry("metrics.interval")
+    lastMetricsTime = time.time()
 
     timeLimit = None if timeLimit == 0 else timeLimit
     memoryLimit = None if memoryLimit == 0 else memoryLimit
+    workerCount = max(1, workerCount)
+    logger.info(f"[autohack] Workers: {workerCount}")
+
+    # Each worker stage gets its own scratch folder, exposed to the programs through environment variables.
+    scratchFolderPath = getScratchFolderPath(CLIENT_ID, LOG_TIME)
+    # Removed on every exit, including failures and interrupts.
+    atexit.register(shutil.rmtree, scratchFolderPath, ignore_errors=True)
+    workerEnvs: dict[tuple[int, str], dict[str, str]] = {}
+    for workerID in range(1, workerCount + 1):
+        for stage in (PREPARE_STAGE, JUDGE_STAGE):
+            workerScratchFolderPath = getWorkerScratchFolderPath(scratchFolderPath, workerID, stage)
+            ensureDirExists(workerScratchFolderPath)
+            workerEnvs[(workerID, stage)] = {
+                **os.environ,
+                "AUTOHACK_WORKER_ID": str(workerID),
+                "AUTOHACK_SCRATCH_FOLDER": str(workerScratchFolderPath),
+            }
+
+    # Custom checkers are not required to be thread-safe, or to accept memory-mapped data.
+    builtinChecker = isBuiltinChecker(CHECKER_FOLDER_PATH, config.getConfigEntry("checker.name"))
+    checkerLock = contextlib.nullcontext() if builtinChecker else threading.Lock()
+
+    def minimizeData(session: str, dataID: int) -> None:
+        dataInput = readSavedInput(session, dataID, config)
+        if dataInput is None:
+            writeMessage(I18n, "__main__.minimize.not-found", dataID, getSessionFolderPath(session), endl=1, highlight=True)
+            exitProgram(1)
+        dataInput = cast(bytes, dataInput)
+        # Keyed by a digest of the input, so that tens of thousands of tested inputs are not all kept in memory.
+        failureKinds: dict[bytes, str | None] = {}
+        failureKindsLock = threading.Lock()
+
+        def getFailureKind(candidate: bytes) -> str | None:
+            candidateKey = hashlib.sha256(candidate).digest()
+            with failureKindsLock:
+                if candidateKey in failureKinds:
+                    return failureKinds[candidateKey]
+            try:
+                if answerCache is not None:
+                    candidateAnswer = answerCache.getOrRun(candidate, lambda: generateAnswer(stdCommand, candidate))
+                else:
+                    candidateAnswer = generateAnswer(stdCommand, candidate)
+            except autohackRuntimeError:
+                # Inputs std rejects are not valid inputs.
+                failureKind = None
+            else:
+                result = runSourceCode(sourceCommand, candidate, timeLimit, memoryLimit)
+                if result.memoryOut:
+                    failureKind = "memory"
+                elif result.timeOut:
+                    failureKind = "time"
+                elif result.returnCode != 0:
+                    failureKind = "runtime"
+                else:
+                    try:
+                        with checkerLock:
+                            accepted = currentChecker(candidate, result.stdout or b"", candidateAnswer, checkerArgs)[0]
+                    except Exception:
+                        accepted = True
+                    failureKind = None if accepted else "wrong"
+            with failureKindsLock:
+                failureKinds[candidateKey] = failureKind
+            return failureKind
+
+        originalKind = getFailureKind(dataInput)
+        if originalKind is None:
+            writeMessage(I18n, "__main__.minimize.not-failing", dataID, endl=1, highlight=True)
+            exitProgram(1)
+        logger.info(f"[autohack] Minimizing data {dataID} of {getSessionFolderPath(session)} ({len(dataInput)} bytes, failure: {originalKind}).")
+        onProgress = lambda level, size: writeMessage(I18n, "__main__.minimize.progress", _(f"__main__.minimize.level.{level}"), size, clear=True)
+        minimizedInput = minimizeInput(dataInput, lambda candidate: getFailureKind(candidate) == originalKind, workerCount, onProgress)
+
+        exportFolderPath = getExportFolderPath(LOG_TIME, CLIENT_ID)
+        writeData(getExportDataPath(exportFolderPath, "input"), minimizedInput)
+        if answerCache is not None:
+            minimizedAnswer = answerCache.getOrRun(minimizedInput, lambda: generateAnswer(stdCommand, minimizedInput))
+        else:
+            minimizedAnswer = generateAnswer(stdCommand, minimizedInput)
+        writeData(getExportDataPath(exportFolderPath, "answer"), minimizedAnswer)
+        logger.info(f"[autohack] Data {dataID} minimized to {len(minimizedInput)} bytes after {len(failureKinds)} tests.")
+        writeMessage(I18n, "__main__.minimize.finish", dataID, len(dataInput), len(minimizedInput), len(failureKinds), endl=1, clear=True)
+        writeMessage(I18n, "__main__.main.save-input-data", getExportDataPath(exportFolderPath, "input"), endl=1)
+        writeMessage(I18n, "__main__.main.save-answer-data", getExportDataPath(exportFolderPath, "answer"), endl=1)
+
+    if args.minimize is not None:
+        minimizeData(args.minimize[0], int(args.minimize[1]))
+        shutil.rmtree(scratchFolderPath, ignore_errors=True)
+        exitProgram(0)
+
+    def getLimitShare(measure: str, value: float) -> str:
+        limit = timeLimit if measure == "time" else memoryLimit
+        return f"{value * 100 / limit:.1f}" if limit is not None else "-"
+
+    def formatMeasure(measure: str, value: float) -> str:
+        return f"{value * 1000:.2f}" if measure == "time" else f"{value / 1024 / 1024:.2f}"
+
+    def updateLeaderboards(data: HackData, result: CodeRunner.Result) -> None:
+        nonlocal savedDataSize
+        values = {"time": result.cpuTime if result.cpuTime is not None else result.totalTime, "memory": result.maxMemory}
+        for measure, value in values.items():
+            # No peak memory means the source used less than autohack itself, so it cannot rank.
+            if value is None:
+                continue
+            added, pushedOutDataID = leaderboards[measure].offer(value, data.dataID)
+            if not added:
+                continue
+            folderPath = getPerformanceFolderPath(getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME), measure)
+            if pushedOutDataID is not None:
+                for filePath in (inputFilePath, answerFilePath, seedFilePath):
+                    removedPath = getHackDataFilePath(folderPath, pushedOutDataID, filePath)
+                    removedPath.unlink(missing_ok=True)
+                    with contextlib.suppress(OSError):
+                        while removedPath.parent != folderPath:
+                            removedPath = removedPath.parent
+                            removedPath.rmdir()
+                savedDataSize -= leaderboardDataSizes.pop((measure, pushedOutDataID), 0)
+            records = [(inputFilePath, data.input), (answerFilePath, data.answer)]
+            if data.seed is not None:
+                records.append((seedFilePath, f"{data.seed}\n".encode()))
+            for filePath, content in records:
+                writeData(getHackDataFilePath(folderPath, data.dataID, filePath), content)
+            leaderboardDataSizes[(measure, data.dataID)] = sum(len(content) for _, content in records)
+            savedDataSize += leaderboardDataSizes[(measure, data.dataID)]
+            entries = [{"data": dataID, measure: entryValue} for entryValue, dataID in leaderboards[measure].entries()]
+            writeData(folderPath / "leaderboard.json", json.dumps(entries, indent=4).encode())
+
+    def getStatus(total: float, addtional: str) -> str:
+        # f"Time taken: {total:.2f} seconds, average {averagePerS:.2f} data per second, {averagePerData:.2f} second per data.{addtional}"
+        averagePerS = dataCount / total if total > 0 else 0.0
+        averagePerData = total / dataCount if dataCount > 0 else 0.0
+        status = getTranslatedMessage(I18n, "__main__.status", f"{total:.2f}", f"{averagePerS:.2f}", f"{averagePerData:.2f}")
+        if duplicateFilter is not None:
+            status += getTranslatedMessage(I18n, "__main__.status.duplicates", duplicateDataCount)
+        slowestStage = metrics.slowestStage()
+        if slowestStage is not None:
+            stage, histogram = slowestStage
+            status += getTranslatedMessage(
+                I18n,
+                "__main__.status.slowest-stage",
+                _(f"__main__.stage.{stage}"),
+                f"{histogram.quantile(0.5)*1000:.2f}",
+                f"{histogram.quantile(0.99)*1000:.2f}",
+            )
+        if performanceEnabled:
+            for measure, leaderboard in leaderboards.items():
+                top = leaderboard.top()
+                if top is not None:
+                    status += getTranslatedMessage(
+                        I18n, f"__main__.status.top-{measure}", formatMeasure(measure, top[0]), getLimitShare(measure, top[0])
+                    )
+        return status + addtional
+
+    def getLiveStatus() -> str:
+        return getStatus(time.time() - startTime, f" ({progressDataID*100/maximumDataLimit:.0f}%)" if maximumDataLimit > 0 else "")
+
+    def updateMetrics(writeFiles: bool) -> None:
+        metrics.setCounter("data", dataCount)
+        metrics.setCounter("error_data", errorDataCount)
+        metrics.setCounter("duplicate_data", duplicateDataCount)
+        if writeFiles and metricsEnabled:
+            try:
+                metrics.write(METRICS_FOLDER_PATH / "metrics.json", METRICS_FOLDER_PATH / "metrics.prom")
+            except OSError as e:
+                logger.warning(f"[autohack] Failed to write metrics: {e}")
+
+    def generateData(workerID: int, dataID: int) -> HackData:
+        data = HackData(dataID, workerID)
+        env = workerEnvs[(workerID, PREPARE_STAGE)]
+        streamingFolderPath = getWorkerScratchFolderPath(scratchFolderPath, workerID, PREPARE_STAGE)
 
-    def updateStatus(total: float, averagePerS: float, averagePerData: float, addtional: str) -> None:
-        # write(
-        #     f"Time taken: {total:.2f} seconds, average {averagePerS:.2f} data per second, {averagePerData:.2f} second per data.{addtional}",
-        #     clear=True,
-        # )
-        writeMessage(I18n, "__main__.status", f"{total:.2f}", f"{averagePerS:.2f}", f"{averagePerData:.2f}", clear=True)
-        write(addtional)
-
-    outputEndl()
-    updateStatus(0.0, 0.0, 0.0, " (0%)" if maximumDataLimit > 0 else "")
-    prevLine()
-
-    startTime = time.time()
-
-    while (maximumDataLimit <= 0 or dataCount < maximumDataLimit) and (errorDataLimit <= 0 or errorDataCount < errorDataLimit):
-        dataInput = b""
-        dataAnswer = b""
-
-        dataCount += 1
+        try:
+            # write(f"{dataID}: Generate input.", clear=True)
+            renderer.setActivity(getTranslatedMessage(I18n, "__main__.main.generate-input", dataID))
+            dataGenerateCommand = generateCommand
+            if seeded:
+                seed = (seedStart + (dataID - 1) * seedStep) % SEED_LIMIT
+                data.seed = seed
+                dataGenerateCommand = fillSeed(generateCommand, seed)
+            with metrics.measure("generator"):
+                if streaming:
+                    generateInputToFile(dataGenerateCommand, streamingFolderPath / f"{dataID}.input", env)
+                    data.input = data.mapFile(streamingFolderPath / f"{dataID}.input")
+                elif batching:
+                    # The generator prints a single case. On its own, the case is saved under a header with a count of 1.
+                    data.caseInput = generateInput(dataGenerateCommand, env)
+                    data.input = buildBatchInput(batchHeader, [data.caseInput])
+                else:
+                    data.input = generateInput(dataGenerateCommand, env)
+        except autohackRuntimeError as e:
+            data.failedStage, data.failedError = "input", e
+            return data
+
+        if duplicateFilter is not None:
+            if streaming:
+                data.duplicate = not duplicateFilter.addFile(streamingFolderPath / f"{dataID}.input")
+            else:
+                data.duplicate = not duplicateFilter.addData(data.input)
+            if data.duplicate:
+                logger.debug("[autohack] Data %d is a duplicate. Skipped.", dataID)
+        return data
+
+    def answerData(workerID: int, data: HackData) -> None:
+        dataID = data.dataID
+        env = workerEnvs[(workerID, PREPARE_STAGE)]
+        streamingFolderPath = getWorkerScratchFolderPath(scratchFolderPath, workerID, PREPARE_STAGE)
 
         try:
-            # write(f"{dataCount}: Generate input.", clear=True)
-            writeMessage(I18n, "__main__.main.generate-input", dataCount, clear=True)
-            logger.debug(f"[autohack] Generating data {dataCount}.")
-            dataInput = generateInput(generateCommand)
+            # write(f"{dataID}: Generate answer.", clear=True)
+            renderer.setActivity(getTranslatedMessage(I18n, "__main__.main.generate-answer", dataID))
+            with metrics.measure("std"):
+                if streaming:
+                    inputFilePath, answerFilePath = streamingFolderPath / f"{dataID}.input", streamingFolderPath / f"{dataID}.answer"
+                    runStd = lambda: generateAnswerToFile(stdCommand, inputFilePath, answerFilePath, env)
+                    if answerCache is not None:
+                        answerCache.getOrRunFile(inputFilePath, answerFilePath, runStd)
+                    else:
+                        runStd()
+                    data.answer = data.mapFile(answerFilePath)
+                elif answerCache is not None:
+                    data.answer = answerCache.getOrRun(data.input, lambda: generateAnswer(stdCommand, data.input, env))
+                else:
+                    data.answer = generateAnswer(stdCommand, data.input, env)
         except autohackRuntimeError as e:
-            logger.error(f"[autohack] Input generation failed with return code {e.returnCode}.")
+            data.failedStage, data.failedError = "answer", e
+
+    def prepareData(workerID: int, dataID: int) -> HackData:
+        data = generateData(workerID, dataID)
+        if data.failedStage is None and not data.duplicate:
+            answerData(workerID, data)
+        return data
+
+    def prepareBatch(workerID: int, batchID: int) -> HackData:
+        batch = HackData(batchID, workerID)
+        firstDataID = (batchID - 1) * batchSize + 1
+        lastDataID = firstDataID + batchSize - 1
+        if maximumDataLimit > 0:
+            lastDataID = min(lastDataID, maximumDataLimit)
+        for dataID in range(firstDataID, lastDataID + 1):
+            batch.cases.append(generateData(workerID, dataID))
+            if batch.cases[-1].failedStage is not None:
+                break
+
+        missingCases: list[HackData] = []
+        for data in batch.cases:
+            if data.failedStage is not None or data.duplicate:
+                continue
+            cachedAnswer = None if answerCache is None else answerCache.get(answerCache.getKey(data.input))
+            if cachedAnswer is None:
+                missingCases.append(data)
+            else:
+                data.answer = cachedAnswer
+        if len(missingCases) == 0:
+            return batch
+
+        renderer.setActivity(getTranslatedMessage(I18n, "__main__.main.generate-answer-batch", missingCases[0].dataID, missingCases[-1].dataID))
+        logger.debug("[autohack] Generating answers for data %d to %d in one batch.", missingCases[0].dataID, missingCases[-1].dataID)
+        try:
+            with metrics.measure("std", len(missingCases)):
+                batchAnswer = generateAnswer(
+                    stdCommand, buildBatchInput(batchHeader, [data.caseInput for data in missingCases]), workerEnvs[(workerID, PREPARE_STAGE)]
+                )
+            caseAnswers = splitBatchOutput(batchAnswer, len(missingCases), batchOutputLines, batchOutputSeparator)
+        except autohackRuntimeError:
+            caseAnswers = None
+        if caseAnswers is not None:
+            for data, caseAnswer in zip(missingCases, caseAnswers):
+                data.answer = caseAnswer
+                if answerCache is not None:
+                    answerCache.put(answerCache.getKey(data.input), caseAnswer)
+            return batch
+
+        # Run std on the cases one by one to find the one it fails on. The cases after it are dropped.
+        logger.debug("[autohack] Batch answer generation failed. Generating answers one by one.")
+        for data in missingCases:
+            answerData(workerID, data)
+            if data.failedStage is not None:
+                del batch.cases[batch.cases.index(data) + 1 :]
+                break
+        return batch
+
+    def checkData(data: HackData) -> None:
+        checkerInput, checkerOutput, checkerAnswer = data.input, cast(bytes, cast(CodeRunner.Result, data.result).stdout), data.answer
+        if streaming and not builtinChecker:
+            checkerInput, checkerOutput, checkerAnswer = bytes(checkerInput), bytes(checkerOutput), bytes(checkerAnswer)
+        try:
+            with checkerLock, metrics.measure("checker"):
+                data.checkerResult = currentChecker(checkerInput, checkerOutput, checkerAnswer, checkerArgs)
+        except Exception as e:
+            data.checkerError = str(e)
+            data.checkerTraceback = traceback.format_exc()
+
+    def judgeData(workerID: int, data: HackData) -> HackData:
+        dataID = data.dataID
+        env = workerEnvs[(workerID, JUDGE_STAGE)]
+
+        # write(f"{dataID}: Run source code.", clear=True)
+        renderer.setActivity(getTranslatedMessage(I18n, "__main__.main.run-source", dataID))
+        with metrics.measure("source"):
+            if streaming:
+                inputFilePath = getWorkerScratchFolderPath(scratchFolderPath, data.workerID, PREPARE_STAGE) / f"{dataID}.input"
+                outputFilePath = getWorkerScratchFolderPath(scratchFolderPath, workerID, JUDGE_STAGE) / f"{dataID}.output"
+                data.result = runSourceCodeWithFiles(sourceCommand, inputFilePath, outputFilePath, timeLimit, memoryLimit, env)
+                if data.result.stdout is None:
+                    data.result.stdout = data.mapFile(outputFilePath)
+            else:
+                data.result = runSourceCode(sourceCommand, data.input, timeLimit, memoryLimit, env)
+        if data.result.stdout is None:
+            data.result.stdout = b""
+        if data.result.stderr is None:
+            data.result.stderr = b""
+
+        checkData(data)
+        return data
+
+    def judgeCases(workerID: int, cases: list[HackData]) -> None:
+        if len(cases) == 1:
+            judgeData(workerID, cases[0])
+            return
+
+        renderer.setActivity(getTranslatedMessage(I18n, "__main__.main.run-source-batch", cases[0].dataID, cases[-1].dataID))
+        logger.debug("[autohack] Run source code for data %d to %d in one batch.", cases[0].dataID, cases[-1].dataID)
+        batchInput = buildBatchInput(batchHeader, [data.caseInput for data in cases])
+        # The time limit applies to each case, so the batch gets the sum of them.
+        with metrics.measure("source", len(cases)):
+            result = runSourceCode(
+                sourceCommand, batchInput, None if timeLimit is None else timeLimit * len(cases), memoryLimit, workerEnvs[(workerID, JUDGE_STAGE)]
+            )
+        caseOutputs = None
+        batchTime = result.cpuTime if result.cpuTime is not None else result.totalTime
+        # A batch over the limit of a single case may hide a case over the limit, so it is bisected like a failing batch.
+        overCaseLimit = timeLimit is not None and batchTime is not None and batchTime > timeLimit
+        if not result.timeOut and not result.memoryOut and result.returnCode == 0 and not overCaseLimit:
+            caseOutputs = splitBatchOutput(result.stdout or b"", len(cases), batchOutputLines, batchOutputSeparator)
+        if caseOutputs is None:
+            # Bisect down to the cases that fail on their own.
+            middle = len(cases) // 2
+            judgeCases(workerID, cases[:middle])
+            judgeCases(workerID, cases[middle:])
+            return
+
+        for data, caseOutput in zip(cases, caseOutputs):
+            # The batch only tells the time and memory of all cases together. Each case gets its share of the time.
+            data.result = CodeRunner.Result(
+                None if result.totalTime is None else result.totalTime / len(cases),
+                False,
+                result.maxMemory,
+                False,
+                0,
+                caseOutput,
+                b"",
+                None if result.cpuTime is None else result.cpuTime / len(cases),
+            )
+            checkData(data)
+            if data.checkerResult is not None and not data.checkerResult[0]:
+                # Judge the case again on its own, so that the saved output belongs to the saved single-case input.
+                data.checkerResult = None
+                judgeData(workerID, data)
+                if data.checkerResult is not None and data.checkerResult[0]:
+                    logger.warning(f"[autohack] Data {data.dataID} only fails when judged together with other data in a batch.")
+
+    def judgeBatch(workerID: int, batch: HackData) -> HackData:
+        judgeCases(workerID, [data for data in batch.cases if data.needsJudging()])
+        return batch
+
+    def committedData() -> Iterator[HackData]:
+        for _, data in pool.results():
+            if batching:
+                yield from data.cases
+            else:
+                yield data
+
+    results.emit(
+        "start",
+        version=__VERSION__,
+        client_id=CLIENT_ID,
+        data_folder=str(getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME)),
+        log_file=str(loggerObj.getLogFilePath()),
+        workers=workerCount,
+        seed_start=seedStart if seeded else None,
+        seed_step=seedStep if seeded else None,
+    )
+    startTime = time.time()
+    renderer = StatusRenderer(refreshRate, getLiveStatus)
+    if not args.headless:
+        renderer.start()
+
+    if batching:
+        logger.info(f"[autohack] Batching {batchSize} data per run.")
+        pool = HackWorkerPool(workerCount, prepareBatch, judgeBatch, -(-maximumDataLimit // batchSize))
+    else:
+        pool = HackWorkerPool(workerCount, prepareData, judgeData, maximumDataLimit)
+    pool.start()
+
+    for data in committedData():
+        dataID = data.dataID
+        if data.duplicate:
+            duplicateDataCount += 1
+            data.release()
+            continue
+        dataCount = dataID - duplicateDataCount
+        progressDataID = dataID
+
+        if data.failedStage == "input":
+            pool.stop()
+            renderer.stop()
+            e = cast(autohackRuntimeError, data.failedError)
+            logger.error(
+                f"[autohack] Input generation failed with return code {e.returnCode}.{f" Seed: {data.seed}" if data.seed is not None else ""}"
+            )
             writeMessage(I18n, "__main__.main.generate-input-failed", e.returnCode, endl=1, clear=True, highlight=True)
+            results.emit("failure", stage="input", id=dataID, seed=data.seed, return_code=e.returnCode)
             inputExportPath = getExportDataPath(getExportFolderPath(LOG_TIME, CLIENT_ID), "input")
             writeData(inputExportPath, e.output)
             writeMessage(I18n, "__main__.main.save-input-data", inputExportPath, clear=True)
             exitProgram(1)
 
-        try:
-            # write(f"{dataCount}: Generate answer.", clear=True)
-            writeMessage(I18n, "__main__.main.generate-answer", dataCount, clear=True)
-            logger.debug(f"[autohack] Generating answer for data {dataCount}.")
-            dataAnswer = generateAnswer(stdCommand, dataInput)
-        except autohackRuntimeError as e:
+        if data.failedStage == "answer":
+            pool.stop()
+            renderer.stop()
+            e = cast(autohackRuntimeError, data.failedError)
             logger.error(f"[autohack] Answer generation failed with return code {e.returnCode}.")
             writeMessage(I18n, "__main__.main.generate-answer-failed", e.returnCode, endl=1, clear=True, highlight=True)
+            results.emit("failure", stage="answer", id=dataID, seed=data.seed, return_code=e.returnCode)
             inputExportPath = getExportDataPath(getExportFolderPath(LOG_TIME, CLIENT_ID), "input")
-            writeData(inputExportPath, dataInput)
+            writeData(inputExportPath, data.input)
             writeMessage(I18n, "__main__.main.save-input-data", inputExportPath, endl=1, clear=True)
             answerExportPath = getExportDataPath(getExportFolderPath(LOG_TIME, CLIENT_ID), "answer")
             writeData(answerExportPath, e.output)
             writeMessage(I18n, "__main__.main.save-answer-data", answerExportPath, clear=True)
             exitProgram(1)
 
-        # write(f"{dataCount}: Run source code.", clear=True)
-        writeMessage(I18n, "__main__.main.run-source", dataCount, clear=True)
-        logger.debug(f"[autohack] Run source code for data {dataCount}.")
-        result = runSourceCode(sourceCommand, dataInput, timeLimit, memoryLimit)
-        if result.stdout is None:
-            result.stdout = b""
-        if result.stderr is None:
-            result.stderr = b""
-
-        # TODO: Refresh when running exe. Use threading or async?
-        if dataCount % refreshSpeed == 0 or lastStatusError:
-            lastStatusError = False
-            currentTime = time.time()
-            outputEndl()
-            # write(
-            #     f"Time taken: {currentTime - startTime:.2f} seconds, average {dataCount/(currentTime - startTime):.2f} data per second, {(currentTime - startTime)/dataCount:.2f} second per data.{f" ({dataCount*100/maximumDataLimit:.0f}%)" if maximumDataLimit > 0 else ""}",
-            #     clear=True,
-            # )
-            updateStatus(
-                currentTime - startTime,
-                dataCount / (currentTime - startTime),
-                (currentTime - startTime) / dataCount,
-                f" ({dataCount*100/maximumDataLimit:.0f}%)" if maximumDataLimit > 0 else "",
-            )
-            prevLine()
+        result = cast(CodeRunner.Result, data.result)
+
+        if metricsEnabled and time.time() - lastMetricsTime >= metricsInterval:
+            lastMetricsTime = time.time()
+            updateMetrics(True)
 
         saveData, termMessage, logMessage, extMessage, exitAfterSave = (False, "", "", None, False)
+        verdict = "OK"
 
         if result.memoryOut:
-            saveData = True
-            logMessage = f"Memory limit exceeded for data {dataCount}."
-            termMessage = getTranslatedMessage(I18n, "__main__.main.memory-limit-exceeded", dataCount)
+            saveData, verdict = True, "MLE"
+            logMessage = f"Memory limit exceeded for data {dataID}."
+            termMessage = getTranslatedMessage(I18n, "__main__.main.memory-limit-exceeded", dataID)
             if result.maxMemory is not None:
                 extMessage = getTranslatedMessage(I18n, "__main__.main.memory-limit-exceeded-extra", f"{result.maxMemory / 1024 / 1024:.4f}")
         elif result.timeOut:
-            saveData = True
-            logMessage = f"Time limit exceeded for data {dataCount}."
-            termMessage = getTranslatedMessage(I18n, "__main__.main.time-limit-exceeded", dataCount)
-            if result.totalTime is not None:
+            saveData, verdict = True, "TLE"
+            logMessage = f"Time limit exceeded for data {dataID}."
+            termMessage = getTranslatedMessage(I18n, "__main__.main.time-limit-exceeded", dataID)
+            if result.totalTime is not None and result.cpuTime is not None:
+                extMessage = getTranslatedMessage(
+                    I18n, "__main__.main.time-limit-exceeded-extra-cpu", f"{result.totalTime*1000:.4f}", f"{result.cpuTime*1000:.4f}"
+                )
+            elif result.totalTime is not None:
                 extMessage = getTranslatedMessage(I18n, "__main__.main.time-limit-exceeded-extra", f"{result.totalTime*1000:.4f}")
         elif result.returnCode != 0:
-            saveData = True
-            logMessage = f"Runtime error for data {dataCount} with return code {result.returnCode}."
-            termMessage = getTranslatedMessage(I18n, "__main__.main.runtime-error", dataCount)
+            saveData, verdict = True, "RE"
+            logMessage = f"Runtime error for data {dataID} with return code {result.returnCode}."
+            termMessage = getTranslatedMessage(I18n, "__main__.main.runtime-error", dataID)
             if result.returnCode is not None:
                 extMessage = getTranslatedMessage(I18n, "__main__.main.runtime-error-extra", f"{result.returnCode}")
 
         checkerResult = (False, _("__main__.main.checker-not-executed"))
-        try:
-            checkerResult = currentChecker(dataInput, result.stdout, dataAnswer, checkerArgs)
-        except Exception as e:
-            saveData = True
-            termMessage = getTranslatedMessage(I18n, "__main__.main.checker-error-without-exception", dataCount)
-            logMessage = f"Checker error for data {dataCount}. Exception: {e}"
-            extMessage = f"{_("__main__.main.checker-error-extra-message")}\n{traceback.format_exc()}"
+        if data.checkerTraceback is not None:
+            saveData, verdict = True, "CHECKER_ERROR"
+            termMessage = getTranslatedMessage(I18n, "__main__.main.checker-error-without-exception", dataID)
+            logMessage = f"Checker error for data {dataID}. Exception: {data.checkerError}"
+            extMessage = f"{_("__main__.main.checker-error-extra-message")}\n{data.checkerTraceback}"
             checkerResult = (False, _("__main__.main.checker-exception-occurred"))
             exitAfterSave = True
+        elif data.checkerResult is not None:
+            checkerResult = data.checkerResult
 
         if not saveData and not checkerResult[0]:
-            saveData = True
-            termMessage = getTranslatedMessage(I18n, "__main__.main.wrong-answer", dataCount)
-            logMessage = f"Wrong answer for data {dataCount}. Checker output: {checkerResult[1]}"
+            saveData, verdict = True, "WA"
+            termMessage = getTranslatedMessage(I18n, "__main__.main.wrong-answer", dataID)
+            logMessage = f"Wrong answer for data {dataID}. Checker output: {checkerResult[1]}"
             extMessage = checkerResult[1]
 
+        # One compact record per data. Its arguments are only formatted in debug mode, and then by the log listener thread.
+        logger.debug(
+            "[case] id=%d verdict=%s worker=%s seed=%s time=%s cpu=%s memory=%s input=%d output=%d",
+            dataID,
+            verdict,
+            data.workerID,
+            data.seed,
+            result.totalTime,
+            result.cpuTime,
+            result.maxMemory,
+            len(data.input),
+            len(result.stdout or b""),
+        )
+
         if saveData:
-            lastStatusError = True
             errorDataCount += 1
-            writeData(getHackDataFilePath(getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME), errorDataCount, inputFilePath), dataInput)
-            writeData(getHackDataFilePath(getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME), errorDataCount, answerFilePath), dataAnswer)
-            writeData(getHackDataFilePath(getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME), errorDataCount, outputFilePath), result.stdout)
-            write(f"[{errorDataCount}]: {termMessage}", 1, True)
+            with metrics.measure("save"):
+                records = [("input", inputFilePath, data.input), ("answer", answerFilePath, data.answer), ("output", outputFilePath, result.stdout)]
+                if data.seed is not None:
+                    records.append(("seed", seedFilePath, f"{data.seed}\n".encode()))
+                for kind, filePath, content in records:
+                    if archive is not None:
+                        savedDataSize += archive.add(errorDataCount, kind, content)
+                    else:
+                        writeData(getHackDataFilePath(getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME), errorDataCount, filePath), content)
+                        savedDataSize += len(content)
+            if data.seed is not None:
+                logMessage += f" Seed: {data.seed}"
+            errorLines = [f"[{errorDataCount}]: {termMessage}"]
             if extMessage is not None and extMessage != "":
-                write(f"{(len(f'[{errorDataCount}]: ')-3)*' '} - {extMessage}", 1, True)
+                errorLines.append(f"{(len(f'[{errorDataCount}]: ')-3)*' '} - {extMessage}")
+            if args.headless:
+                for errorLine in errorLines:
+                    write(errorLine)
+            else:
+                renderer.writeLines(errorLines)
             logger.info(f"[autohack] {logMessage}")
 
+        results.emit(
+            "case",
+            id=dataID,
+            verdict=verdict,
+            seed=data.seed,
+            time=result.totalTime,
+            cpu_time=result.cpuTime,
+            memory=result.maxMemory,
+            error_data=errorDataCount if saveData else None,
+            message=logMessage if saveData else None,
+        )
+
+        if performanceEnabled:
+            updateLeaderboards(data, result)
+
         if exitAfterSave:
+            pool.stop()
+            renderer.stop()
             writeMessage(I18n, "__main__.main.checker-failed-exit", clear=True, highlight=True)
             exitProgram(0)
 
+        data.release()
+
+        # Stop here so that the workers do not save more error data than the limit.
+        if errorDataLimit > 0 and errorDataCount >= errorDataLimit:
+            break
+
+    pool.stop()
+    renderer.stop()
+    if archive is not None:
+        archive.close()
+    shutil.rmtree(scratchFolderPath, ignore_errors=True)
+    updateMetrics(True)
+    for stage, histogram in metrics.stages.items():
+        logger.info(
+            f"[autohack] Stage {stage}: {histogram.count} runs, mean {histogram.mean()*1000:.2f} ms, p50 {histogram.quantile(0.5)*1000:.2f} ms, p95 {histogram.quantile(0.95)*1000:.2f} ms, p99 {histogram.quantile(0.99)*1000:.2f} ms, max {histogram.max*1000:.2f} ms."
+        )
+    if answerCache is not None:
+        logger.info(f"[autohack] Answer cache: {answerCache.hits} hits, {answerCache.misses} misses.")
+
     endTime = time.time()
 
     writeMessage(I18n, "__main__.main.finish", dataCount, errorDataCount, endl=1, clear=True)
-    # write(
-    #     f"Time taken: {endTime - startTime:.2f} seconds, average {dataCount/(endTime - startTime):.2f} data per second, {(endTime - startTime)/dataCount:.2f} second per data.",
-    #     2,
-    #     True,
-    # )
-    updateStatus(endTime - startTime, dataCount / (endTime - startTime), (endTime - startTime) / dataCount, "")
+    results.emit("finish", data=dataCount, error_data=errorDataCount, duplicate_data=duplicateDataCount, elapsed=endTime - startTime)
+    results.close()
+    if duplicateFilter is not None:
+        writeMessage(I18n, "__main__.main.duplicates-skipped", duplicateDataCount, endl=1)
+        logger.info(f"[autohack] {duplicateDataCount} duplicate data skipped.")
+    if performanceEnabled:
+        for measure, leaderboard in leaderboards.items():
+            top = leaderboard.top()
+            if top is None:
+                continue
+            folderPath = getPerformanceFolderPath(getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME), measure)
+            writeMessage(
+                I18n,
+                f"__main__.performance.top-{measure}",
+                top[1],
+                formatMeasure(measure, top[0]),
+                getLimitShare(measure, top[0]),
+                len(leaderboard.entries()),
+                folderPath,
+                endl=1,
+            )
+            logger.info(
+                f"[autohack] Top {measure}: {", ".join(f"data {dataID} {formatMeasure(measure, value)} {"ms" if measure == "time" else "MiB"}" for value, dataID in leaderboard.entries())}"
+            )
+    write(getStatus(endTime - startTime, ""), clear=True)
     outputEndl(2)
 
     # if errorDataCount == 0:
@@ -294,8 +910,19 @@ def main() -> None:
     #     logger.info("[autohack] No error data found. Hack data folder removed.")
 
     dataFolderMaxSize = globalConfig.getConfigEntry("data_folder_max_size")
-    # print(getFolderSize(HACK_DATA_STORAGE_FOLDER_PATH) / 1024 / 1024, " ", dataFolderMaxSize)
-    if HACK_DATA_STORAGE_FOLDER_PATH.exists() and getFolderSize(HACK_DATA_STORAGE_FOLDER_PATH) > dataFolderMaxSize * 1024 * 1024:
+    sessionName = getHackDataStorageFolderPath(CLIENT_ID, LOG_TIME).name
+    ledger = StorageLedger(HACK_DATA_STORAGE_FOLDER_PATH)
+    if savedDataSize > 0:
+        ledger.setSessionSize(sessionName, savedDataSize)
+    ledger.load()
+    evictedSessions = ledger.evict(dataFolderMaxSize * 1024 * 1024, globalConfig.getConfigEntry("data_folder_eviction"), {sessionName})
+    if evictedSessions:
+        logger.info(f"[autohack] Removed {len(evictedSessions)} sessions from the hack data storage folder: {", ".join(evictedSessions)}")
+        writeMessage(I18n, "__main__.data-folder-evicted", len(evictedSessions), dataFolderMaxSize, endl=2)
+    if HACK_DATA_STORAGE_FOLDER_PATH.exists():
+        ledger.save()
+    # print(ledger.totalSize() / 1024 / 1024, " ", dataFolderMaxSize)
+    if ledger.totalSize() > dataFolderMaxSize * 1024 * 1024:
         logger.warning(f"[autohack] Hack data storage folder size exceeds {dataFolderMaxSize} MB: {HACK_DATA_STORAGE_FOLDER_PATH}")
         # write(f"Warning: Hack data storage folder size exceeds {DATA_FOLDER_MAX_SIZE} MB: {HACK_DATA_STORAGE_FOLDER_PATH}", 2)
         writeMessage(I18n, "__main__.data-folder-size-warning", dataFolderMaxSize, HACK_DATA_STORAGE_FOLDER_PATH, endl=2, highlight=True)
@@ -316,7 +943,10 @@ def main() -> None:
 
 
 if __name__ == "__main__" or os.getenv("AUTOHACK_ENTRYPOINT", "0") == "1":
-    colorama.just_fix_windows_console()
+    if mswindows():
+        import colorama
+
+        colorama.just_fix_windows_console()
 
     try:
         main()
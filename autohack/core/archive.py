@@ -0,0 +1,95 @@
+from autohack.core.util import *
+from typing import Iterator, NamedTuple
+import pathlib, struct, zlib, lzma
+
+ARCHIVE_DATA_FILE_NAME = "data.pack"
+ARCHIVE_INDEX_FILE_NAME = "data.index"
+
+# Kinds of records, in the order of the paths config entries.
+RECORD_KINDS = ["input", "answer", "output", "seed"]
+
+COMPRESSION_METHODS = ["none", "zlib", "lzma"]
+
+# Data ID, kind, compression method, offset in the data file, stored size, original size.
+INDEX_ENTRY = struct.Struct("<IBBQII")
+
+
+class ArchiveRecord(NamedTuple):
+    dataID: int
+    kind: str
+    method: str
+    offset: int
+    size: int
+    rawSize: int
+
+
+def compressRecord(content: bytes, method: str) -> bytes:
+    if method == "zlib":
+        return zlib.compress(content, 6)
+    if method == "lzma":
+        return lzma.compress(content, preset=6)
+    return content
+
+
+def decompressRecord(content: bytes, method: str) -> bytes:
+    if method == "zlib":
+        return zlib.decompress(content)
+    if method == "lzma":
+        return lzma.decompress(content)
+    return content
+
+
+def hasArchive(folderPath: pathlib.Path) -> bool:
+    return (folderPath / ARCHIVE_INDEX_FILE_NAME).is_file()
+
+
+class HackDataArchive:
+    """
+    Error data of a session packed into one data file of separately compressed records, with an index of fixed-size entries.
+    Records are only appended, and an index entry is written after its record, so a session killed midway leaves a readable archive.
+    """
+
+    def __init__(self, folderPath: pathlib.Path, compression: str = "zlib") -> None:
+        if compression not in COMPRESSION_METHODS:
+            raise ValueError(f"Unknown compression method: {compression}")
+        self.folderPath = folderPath
+        self.compression = compression
+        self.dataFile = None
+        self.indexFile = None
+
+    def add(self, dataID: int, kind: str, content: bytes) -> int:
+        """Appends a record and returns the number of bytes it takes on disk."""
+        if self.dataFile is None or self.indexFile is None:
+            ensureDirExists(self.folderPath)
+            self.dataFile = open(self.folderPath / ARCHIVE_DATA_FILE_NAME, "ab")
+            self.indexFile = open(self.folderPath / ARCHIVE_INDEX_FILE_NAME, "ab")
+        packed = compressRecord(content, self.compression)
+        # Keep whichever is smaller, as inputs of random numbers hardly compress.
+        method = self.compression if len(packed) < len(content) else "none"
+        if method == "none":
+            packed = content
+        offset = self.dataFile.tell()
+        self.dataFile.write(packed)
+        self.dataFile.flush()
+        self.indexFile.write(INDEX_ENTRY.pack(dataID, RECORD_KINDS.index(kind), COMPRESSION_METHODS.index(method), offset, len(packed), len(content)))
+        self.indexFile.flush()
+        return len(packed) + INDEX_ENTRY.size
+
+    def close(self) -> None:
+        for file in (self.dataFile, self.indexFile):
+            if file is not None:
+                file.close()
+        self.dataFile, self.indexFile = None, None
+
+    def records(self) -> Iterator[ArchiveRecord]:
+        index = readData(self.folderPath / ARCHIVE_INDEX_FILE_NAME)
+        # An entry cut short by a crash is ignored.
+        for position in range(0, len(index) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size):
+            dataID, kind, method, offset, size, rawSize = INDEX_ENTRY.unpack_from(index, position)
+            yield ArchiveRecord(dataID, RECORD_KINDS[kind], COMPRESSION_METHODS[method], offset, size, rawSize)
+
+    def read(self, records: list[ArchiveRecord]) -> Iterator[tuple[ArchiveRecord, bytes]]:
+        with open(self.folderPath / ARCHIVE_DATA_FILE_NAME, "rb") as dataFile:
+            for record in records:
+                dataFile.seek(record.offset)
+                yield record, decompressRecord(dataFile.read(record.size), record.method)
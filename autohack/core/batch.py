@@ -0,0 +1,40 @@
+import re
+
+
+def buildBatchInput(header: str, caseInputs: list[bytes]) -> bytes:
+    """Joins the inputs of several cases under the header, with $(count) replaced by the number of cases."""
+    parts = [header.replace("$(count)", str(len(caseInputs))).encode()]
+    for caseInput in caseInputs:
+        parts.append(caseInput)
+        if len(caseInput) > 0 and not caseInput.endswith(b"\n"):
+            parts.append(b"\n")
+    return b"".join(parts)
+
+
+def splitBatchOutput(output: bytes, count: int, outputLines: int, separator: str) -> list[bytes] | None:
+    """
+    Splits the output of a batch into the outputs of its cases.
+    With a separator, every case ends with a line equal to it. Otherwise every case prints outputLines lines.
+    Returns None if the output does not split into count cases.
+    """
+    if count == 1:
+        return [output]
+    if separator != "":
+        # Each case keeps its separator line, so that it matches the output of the case run on its own.
+        separatorPattern = re.compile(rb"^" + re.escape(separator.encode()) + rb"[ \t\r]*(?:\n|\Z)", re.MULTILINE)
+        pieces, pieceStart = [], 0
+        for match in separatorPattern.finditer(output):
+            pieces.append(output[pieceStart : match.end()])
+            pieceStart = match.end()
+        if len(pieces) != count or output[pieceStart:].strip() != b"":
+            return None
+        return pieces
+
+    lines = output.split(b"\n")
+    if lines[-1] == b"":
+        lines.pop()
+    while len(lines) > count * outputLines and lines[-1].strip() == b"":
+        lines.pop()
+    if outputLines <= 0 or len(lines) != count * outputLines:
+        return None
+    return [b"\n".join(lines[i * outputLines : (i + 1) * outputLines]) + b"\n" for i in range(count)]
@@ -0,0 +1,281 @@
+from autohack.core.exception import *
+from autohack.core.path import *
+from autohack.core.run import *
+from typing import Callable
+import collections, subprocess, threading, hashlib, pathlib, shutil, json, time, re, os
+
+# Number of compiled binaries kept in a compile cache folder. The least recently used ones are removed first.
+COMPILE_CACHE_LIMIT = 16
+
+INCLUDE_PATTERN = re.compile(rb'^\s*#\s*include\s*"([^"]+)"', re.MULTILINE)
+
+compilerVersions: dict[str, str] = {}
+compilerVersionsLock = threading.Lock()
+
+
+def hashFile(filePath: pathlib.Path) -> str:
+    fileHash = hashlib.sha256()
+    with open(filePath, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            fileHash.update(chunk)
+    return fileHash.hexdigest()
+
+
+def getCompilerVersion(compiler: str) -> str:
+    with compilerVersionsLock:
+        if compiler in compilerVersions:
+            return compilerVersions[compiler]
+    try:
+        version = subprocess.run([compiler, "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT).stdout.decode(errors="ignore")
+    except OSError:
+        version = ""
+    with compilerVersionsLock:
+        compilerVersions[compiler] = version
+    return version
+
+
+def getCompileOutputPath(compileCommand: list) -> pathlib.Path | None:
+    for i, arg in enumerate(compileCommand):
+        if arg == "-o" and i + 1 < len(compileCommand):
+            return pathlib.Path(compileCommand[i + 1])
+        if arg.startswith("-o") and len(arg) > 2:
+            return pathlib.Path(arg[2:])
+    return None
+
+
+def getReferencedFiles(compileCommand: list, outputPath: pathlib.Path) -> list[pathlib.Path]:
+    """Files named on the command line, plus the local headers they include with #include "..."."""
+    pending = [pathlib.Path(arg) for arg in compileCommand[1:] if isinstance(arg, str) and not arg.startswith("-")]
+    pending = [filePath for filePath in pending if filePath != outputPath and filePath.is_file()]
+    visited: list[pathlib.Path] = []
+    while pending:
+        filePath = pending.pop()
+        if filePath.resolve() in (visitedPath.resolve() for visitedPath in visited):
+            continue
+        visited.append(filePath)
+        try:
+            content = readData(filePath)
+        except OSError:
+            continue
+        for match in INCLUDE_PATTERN.finditer(content):
+            includePath = filePath.parent / match.group(1).decode(errors="ignore")
+            if includePath.is_file():
+                pending.append(includePath)
+    return sorted(visited)
+
+
+def getCompileCacheKey(compileCommand: list, outputPath: pathlib.Path, extra: list[str] = []) -> str:
+    keyHash = hashlib.sha256()
+    keyHash.update(json.dumps([str(arg) for arg in compileCommand]).encode())
+    keyHash.update(getCompilerVersion(str(compileCommand[0])).encode())
+    for filePath in getReferencedFiles(compileCommand, outputPath):
+        keyHash.update(f"{filePath.as_posix()}\0{hashFile(filePath)}\0".encode())
+    for item in extra:
+        keyHash.update(f"{item}\0".encode())
+    return keyHash.hexdigest()
+
+
+def findCompiledFile(outputPath: pathlib.Path) -> pathlib.Path | None:
+    # g++ on Windows appends .exe to the output name.
+    for filePath in (outputPath, outputPath.with_name(f"{outputPath.name}.exe")):
+        if filePath.is_file():
+            return filePath
+    return None
+
+
+def pruneCompileCache(cacheFolder: pathlib.Path) -> None:
+    try:
+        entries = sorted(
+            (entry for entry in cacheFolder.iterdir() if entry.is_dir() and not entry.name.startswith(".")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+    except OSError:
+        return
+    for entry in entries[COMPILE_CACHE_LIMIT:]:
+        shutil.rmtree(entry, ignore_errors=True)
+
+
+def compileCodeCached(compileCommand: list, cacheFolder: pathlib.Path = COMPILE_CACHE_FOLDER_PATH, extra: list[str] = []) -> bool:
+    """
+    Compiles like compileCode, but reuses the binary from an earlier build with the same command line,
+    source files, local headers and compiler version. Returns True if the cached binary was reused.
+    Commands without an -o argument are always compiled.
+    """
+    outputPath = getCompileOutputPath(compileCommand)
+    if outputPath is None:
+        compileCode(compileCommand)
+        return False
+
+    entryPath = cacheFolder / getCompileCacheKey(compileCommand, outputPath, extra)
+    if entryPath.is_dir():
+        cachedFiles = [filePath for filePath in entryPath.iterdir() if filePath.is_file()]
+        if len(cachedFiles) == 1:
+            targetPath = outputPath.with_name(cachedFiles[0].name)
+            ensureDirExists(targetPath.parent)
+            temporaryPath = targetPath.with_name(f".{targetPath.name}.{os.getpid()}.{threading.get_ident()}")
+            shutil.copy2(cachedFiles[0], temporaryPath)
+            os.replace(temporaryPath, targetPath)
+            os.utime(entryPath)
+            return True
+
+    startTime = time.time()
+    compileCode(compileCommand)
+
+    # Only store binaries produced by this build, not one left over when the compiler could not be started.
+    compiledPath = findCompiledFile(outputPath)
+    if compiledPath is not None and compiledPath.stat().st_mtime >= startTime - 1:
+        temporaryPath = cacheFolder / f".{entryPath.name}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            ensureDirExists(temporaryPath)
+            shutil.copy2(compiledPath, temporaryPath / compiledPath.name)
+            os.replace(temporaryPath, entryPath)
+        except OSError:
+            # Another build stored the same entry first.
+            shutil.rmtree(temporaryPath, ignore_errors=True)
+        pruneCompileCache(cacheFolder)
+    return False
+
+
+def getProgramHash(runCommand: list) -> str:
+    """
+    Hash of a run command, the executable it starts and every file named in its arguments, so that rebuilding the program
+    or editing a script run by an interpreter, e.g. std.py in ["python3", "std.py"], changes the hash.
+    """
+    programHash = hashlib.sha256(json.dumps([str(arg) for arg in runCommand]).encode())
+    executable = shutil.which(str(runCommand[0])) or str(runCommand[0])
+    for filePath in [executable] + [str(arg) for arg in runCommand[1:]]:
+        if os.path.isfile(filePath):
+            programHash.update(hashFile(pathlib.Path(filePath)).encode())
+    return programHash.hexdigest()
+
+
+class AnswerCache:
+    """
+    On-disk store of std answers keyed by the std program and the input, shared by all sessions in the project.
+    Entries are evicted least recently used first once the store grows beyond maxSize bytes.
+    """
+
+    def __init__(self, cacheFolder: pathlib.Path, stdCommand: list, maxSize: int) -> None:
+        self.cacheFolder = cacheFolder
+        self.maxSize = maxSize
+        self.programHash = getProgramHash(stdCommand)
+        self.lock = threading.Lock()
+        # Entry key -> size, least recently used first.
+        self.entries: collections.OrderedDict[str, int] = collections.OrderedDict()
+        self.totalSize = 0
+        self.hits = 0
+        self.misses = 0
+        ensureDirExists(cacheFolder)
+        existingEntries = []
+        for entry in os.scandir(cacheFolder):
+            if entry.is_file() and not entry.name.startswith("."):
+                entryStat = entry.stat()
+                existingEntries.append((entryStat.st_mtime, entry.name, entryStat.st_size))
+        for _, key, size in sorted(existingEntries):
+            self.entries[key] = size
+            self.totalSize += size
+        with self.lock:
+            self.evict()
+
+    def getKey(self, dataInput: bytes) -> str:
+        keyHash = hashlib.sha256(self.programHash.encode())
+        keyHash.update(dataInput)
+        return keyHash.hexdigest()
+
+    def getFileKey(self, inputFilePath: pathlib.Path) -> str:
+        keyHash = hashlib.sha256(self.programHash.encode())
+        with open(inputFilePath, "rb") as inputFile:
+            for chunk in iter(lambda: inputFile.read(1 << 20), b""):
+                keyHash.update(chunk)
+        return keyHash.hexdigest()
+
+    def get(self, key: str) -> bytes | None:
+        if not self.use(key):
+            return None
+        try:
+            return readData(self.cacheFolder / key)
+        except OSError:
+            self.forget(key)
+            return None
+
+    def getToFile(self, key: str, filePath: pathlib.Path) -> bool:
+        if not self.use(key):
+            return False
+        try:
+            shutil.copyfile(self.cacheFolder / key, filePath)
+        except OSError:
+            self.forget(key)
+            return False
+        return True
+
+    def put(self, key: str, dataAnswer: bytes) -> None:
+        if len(dataAnswer) > self.maxSize:
+            return
+        temporaryPath = self.cacheFolder / f".{key}.{threading.get_ident()}"
+        try:
+            writeData(temporaryPath, dataAnswer)
+            os.replace(temporaryPath, self.cacheFolder / key)
+        except OSError:
+            temporaryPath.unlink(missing_ok=True)
+            return
+        self.add(key, len(dataAnswer))
+
+    def putFile(self, key: str, filePath: pathlib.Path) -> None:
+        size = filePath.stat().st_size
+        if size > self.maxSize:
+            return
+        temporaryPath = self.cacheFolder / f".{key}.{threading.get_ident()}"
+        try:
+            shutil.copyfile(filePath, temporaryPath)
+            os.replace(temporaryPath, self.cacheFolder / key)
+        except OSError:
+            temporaryPath.unlink(missing_ok=True)
+            return
+        self.add(key, size)
+
+    def getOrRun(self, dataInput: bytes, runStd: Callable[[], bytes]) -> bytes:
+        """Returns the cached answer for the input, or runs std and stores its answer. Errors of std are not cached."""
+        key = self.getKey(dataInput)
+        dataAnswer = self.get(key)
+        if dataAnswer is None:
+            dataAnswer = runStd()
+            self.put(key, dataAnswer)
+        return dataAnswer
+
+    def getOrRunFile(self, inputFilePath: pathlib.Path, answerFilePath: pathlib.Path, runStd: Callable[[], None]) -> None:
+        """Like getOrRun, for streaming mode where std writes its answer to answerFilePath."""
+        key = self.getFileKey(inputFilePath)
+        if not self.getToFile(key, answerFilePath):
+            runStd()
+            self.putFile(key, answerFilePath)
+
+    def use(self, key: str) -> bool:
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return False
+            self.hits += 1
+            self.entries.move_to_end(key)
+        try:
+            # The modification time keeps the order for the next session.
+            os.utime(self.cacheFolder / key)
+        except OSError:
+            pass
+        return True
+
+    def add(self, key: str, size: int) -> None:
+        with self.lock:
+            self.totalSize += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.evict()
+
+    def forget(self, key: str) -> None:
+        with self.lock:
+            self.totalSize -= self.entries.pop(key, 0)
+
+    def evict(self) -> None:
+        while self.totalSize > self.maxSize and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.totalSize -= size
+            (self.cacheFolder / key).unlink(missing_ok=True)
@@ -1,33 +1,176 @@
+from autohack.core.cache import *
 from autohack.core.constant import *
 from autohack.core.exception import *
 from autohack.core.path import *
 from autohack.core.run import *
 from autohack.core.util import *
 from typing import Any, Callable, TypeAlias, cast
-import importlib.util, subprocess, pathlib, shutil
+import importlib.util, itertools, tempfile, pathlib, atexit, shutil, queue, math, re
 
 checkerType: TypeAlias = Callable[[bytes, bytes, bytes, dict], tuple[bool, str]]
 activateType: TypeAlias = Callable[[dict], checkerType]
 deactivateType: TypeAlias = Callable[[dict], None]
 emptyDeactivate: deactivateType = lambda args: None
 
+# Scratch folder of the active testlib checker, removed on deactivate.
+testlibScratchRootPath: pathlib.Path | None = None
+
+
+# Compared slice by slice, so that memory-mapped data is never copied as a whole.
+COMPARE_CHUNK_SIZE = 1 << 16
+
+# Whitespace that bytes.rstrip removes, other than line breaks.
+LINE_END_WHITESPACE = b" \t\r\x0b\x0c"
+LINE_END_WHITESPACE_PATTERN = re.compile(rb"[ \t\r\x0b\x0c]+\n")
+# bytes.replace is much faster than a regex, but removes one whitespace character per line and round.
+LINE_END_REPLACE_ROUNDS = 4
+
+
+def findCommonPrefixLength(output: bytes, answer: bytes, length: int) -> int:
+    position = 0
+    while position < length:
+        end = min(position + COMPARE_CHUNK_SIZE, length)
+        outputChunk, answerChunk = output[position:end], answer[position:end]
+        if outputChunk != answerChunk:
+            low, high = 0, end - position
+            while low < high:
+                middle = (low + high + 1) // 2
+                if outputChunk[low:middle] == answerChunk[low:middle]:
+                    low = middle
+                else:
+                    high = middle - 1
+            return position + low
+        position = end
+    return length
+
+
+def countLines(data: bytes, end: int) -> int:
+    """Number of line breaks in data[:end]. Works on memory-mapped data, which has no count method."""
+    return sum(data[position : min(position + COMPARE_CHUNK_SIZE, end)].count(b"\n") for position in range(0, end, COMPARE_CHUNK_SIZE))
+
+
+def stripLineEnds(data: bytes) -> bytes:
+    """Removes whitespace at the end of every line, like rstrip on each line, keeping the line breaks."""
+    data = data.rstrip(LINE_END_WHITESPACE)
+    for _ in range(LINE_END_REPLACE_ROUNDS):
+        needles = [bytes((character, 0x0A)) for character in LINE_END_WHITESPACE if bytes((character, 0x0A)) in data]
+        if not needles:
+            return data
+        for needle in needles:
+            data = data.replace(needle, b"\n")
+    return LINE_END_WHITESPACE_PATTERN.sub(b"\n", data)
+
+
+def compareTextBytes(output: bytes, answer: bytes) -> tuple[int, int] | None:
+    """
+    Compares output with answer line by line, ignoring trailing whitespace at line ends and final newlines, without decoding.
+    Returns None if they match, otherwise the 1-based line and column of the first difference.
+    A column of 0 means that one of them has more lines.
+    """
+    outputLength, answerLength = len(output), len(answer)
+    if outputLength == answerLength and (output == answer or findCommonPrefixLength(output, answer, outputLength) == outputLength):
+        return None
+
+    while outputLength > 0 and output[outputLength - 1] == 0x0A:
+        outputLength -= 1
+    while answerLength > 0 and answer[answerLength - 1] == 0x0A:
+        answerLength -= 1
+    # An empty text has no lines at all, not one empty line.
+    if outputLength == 0 or answerLength == 0:
+        return None if outputLength == answerLength else (1, 0)
+
+    # Lines before the first differing byte are equal. Only the rest is copied, with trailing whitespace removed.
+    lineStart = output.rfind(b"\n", 0, findCommonPrefixLength(output, answer, min(outputLength, answerLength))) + 1
+    outputRest = stripLineEnds(output[lineStart:outputLength])
+    answerRest = stripLineEnds(answer[lineStart:answerLength])
+    if outputRest == answerRest:
+        return None
+
+    prefixLength = findCommonPrefixLength(outputRest, answerRest, min(len(outputRest), len(answerRest)))
+    line = countLines(output, lineStart) + outputRest.count(b"\n", 0, prefixLength) + 1
+    # One of them ended where the other one only starts a new line.
+    longerRest = outputRest if len(outputRest) > len(answerRest) else answerRest
+    if prefixLength == min(len(outputRest), len(answerRest)) and longerRest[prefixLength : prefixLength + 1] == b"\n":
+        return (line + 1, 0)
+    return (line, prefixLength - outputRest.rfind(b"\n", 0, prefixLength))
+
 
 def builtinBasicCheckerActivate(args: dict) -> checkerType:
     def builtinBasicChecker(input: bytes, output: bytes, answer: bytes, args: dict) -> tuple[bool, str]:
-        outputStr = output.decode().rstrip("\n")
-        answerStr = answer.decode().rstrip("\n")
-        outputLines = outputStr.splitlines()
-        answerLines = answerStr.splitlines()
-        if len(outputLines) != len(answerLines):
-            return (False, "Output and answer have different number of lines.")
-        for i in range(len(outputLines)):
-            if outputLines[i].rstrip() != answerLines[i].rstrip():
-                return (False, f"Line {i + 1} does not match.")
-        return (True, "Output matches the answer.")
+        difference = compareTextBytes(output, answer)
+        if difference is None:
+            return (True, "Output matches the answer.")
+        line, column = difference
+        if column == 0:
+            return (False, f"Output and answer have different number of lines. Line {line} does not match.")
+        return (False, f"Line {line} does not match at column {column}.")
 
     return builtinBasicChecker
 
 
+TOKEN_PATTERN = re.compile(rb"\S+")
+
+# Longest part of a token shown in checker messages.
+TOKEN_DISPLAY_LENGTH = 32
+
+
+def splitTokens(data: bytes) -> list[bytes]:
+    # Memory-mapped data has no split method, but can be searched with a regex.
+    return data.split() if isinstance(data, bytes) else TOKEN_PATTERN.findall(data)
+
+
+def formatToken(token: bytes) -> str:
+    text = token.decode(errors="replace")
+    return text if len(text) <= TOKEN_DISPLAY_LENGTH else f"{text[:TOKEN_DISPLAY_LENGTH]}..."
+
+
+def tokensClose(output: bytes, answer: bytes, absoluteError: float, relativeError: float) -> bool:
+    try:
+        outputValue, answerValue = float(output), float(answer)
+    except ValueError:
+        return False
+    if math.isnan(outputValue) or math.isnan(answerValue):
+        return math.isnan(outputValue) and math.isnan(answerValue)
+    if math.isinf(outputValue) or math.isinf(answerValue):
+        return outputValue == answerValue
+    return abs(outputValue - answerValue) <= max(absoluteError, relativeError * abs(answerValue))
+
+
+def findDifferentToken(
+    outputTokens: list[bytes], answerTokens: list[bytes], indices: list[int], absoluteError: float, relativeError: float
+) -> int | None:
+    for i in indices:
+        if not tokensClose(outputTokens[i], answerTokens[i], absoluteError, relativeError):
+            return i
+    return None
+
+
+def builtinTokensCheckerActivate(args: dict) -> checkerType:
+    absoluteError = float(args.get("absolute_error", 0))
+    relativeError = float(args.get("relative_error", 0))
+
+    def builtinTokensChecker(input: bytes, output: bytes, answer: bytes, args: dict) -> tuple[bool, str]:
+        outputTokens, answerTokens = splitTokens(output), splitTokens(answer)
+        if outputTokens == answerTokens:
+            return (True, f"{len(answerTokens)} tokens match.")
+        indices = [i for i, (outputToken, answerToken) in enumerate(zip(outputTokens, answerTokens)) if outputToken != answerToken]
+        index: int | None = None
+        if indices and (absoluteError > 0 or relativeError > 0):
+            index = findDifferentToken(outputTokens, answerTokens, indices, absoluteError, relativeError)
+        elif indices:
+            index = indices[0]
+        if index is not None:
+            return (
+                False,
+                f"Token {index + 1} does not match: expected {formatToken(answerTokens[index])}, found {formatToken(outputTokens[index])}.",
+            )
+        if len(outputTokens) != len(answerTokens):
+            return (False, f"Output has {len(outputTokens)} tokens, answer has {len(answerTokens)}.")
+        return (True, f"{len(answerTokens)} tokens match within the allowed error.")
+
+    return builtinTokensChecker
+
+
 def builtinAlwaysACCheckerActivate(args: dict) -> checkerType:
     def builtinAlwaysACChecker(input: bytes, output: bytes, answer: bytes, args: dict) -> tuple[bool, str]:
         return (True, "Always AC checker.")
@@ -51,29 +194,52 @@ from https://www.luogu.com/article/t5rrziq7
 
 
 def builtinTestlibCheckerActivate(args: dict) -> checkerType:
-    ensureDirExists(DATA_FOLDER_PATH / "testlibCheckerCache")
-    checkerPath = DATA_FOLDER_PATH / "testlibCheckerCache" / "checker"
-    compileCommand = [args.get("compiler", "g++"), args.get("checker", "checker.cpp"), "-o", checkerPath.as_posix()]
+    ensureDirExists(TESTLIB_CHECKER_CACHE_FOLDER_PATH)
+    checkerPath = TESTLIB_CHECKER_CACHE_FOLDER_PATH / "checker"
+    checkerSourcePath = pathlib.Path(args.get("checker", "checker.cpp"))
+    compileCommand = [args.get("compiler", "g++"), checkerSourcePath.as_posix(), "-o", checkerPath.as_posix()]
     compileCommand += args.get("compile_args", [])
+    # testlib.h is often included as <testlib.h>, which the include scan does not follow.
+    testlibHeaderPath = checkerSourcePath.parent / "testlib.h"
+    extra = [hashFile(testlibHeaderPath)] if testlibHeaderPath.is_file() else []
     try:
-        compileCode(compileCommand)
+        compileCodeCached(compileCommand, TESTLIB_CHECKER_CACHE_FOLDER_PATH / "build", extra)
     except autohackRuntimeError as e:
         raise
 
+    # Every check takes a scratch folder of its own, so checks can run at the same time.
+    # Folders are reused by later checks, and live in memory when a RAM-backed folder is available.
+    global testlibScratchRootPath
+    testlibScratchRootPath = pathlib.Path(tempfile.mkdtemp(prefix="autohack-testlib-", dir=MEMORY_FOLDER_PATH or TESTLIB_CHECKER_CACHE_FOLDER_PATH))
+    scratchRootPath = testlibScratchRootPath
+    # Deactivating removes the folder, but not every exit deactivates the checker.
+    atexit.register(shutil.rmtree, scratchRootPath, ignore_errors=True)
+    freeScratchFolders: queue.SimpleQueue[pathlib.Path] = queue.SimpleQueue()
+    scratchFolderIDs = itertools.count(1)
+
     def builtinTestlibChecker(input: bytes, output: bytes, answer: bytes, args: dict) -> tuple[bool, str]:
-        inputPath = DATA_FOLDER_PATH / "testlibCheckerCache" / "input"
-        outputPath = DATA_FOLDER_PATH / "testlibCheckerCache" / "output"
-        answerPath = DATA_FOLDER_PATH / "testlibCheckerCache" / "answer"
-        resultPath = DATA_FOLDER_PATH / "testlibCheckerCache" / "result"
-        checkerPath = DATA_FOLDER_PATH / "testlibCheckerCache" / "checker"
-        writeData(inputPath, input)
-        writeData(outputPath, output)
-        writeData(answerPath, answer)
-        command = [checkerPath.as_posix(), inputPath.as_posix(), outputPath.as_posix(), answerPath.as_posix(), resultPath.as_posix()]
-        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
-        if not resultPath.exists():
-            raise FileNotFoundError("Testlib checker did not produce a result file.")
-        resultContent = readData(resultPath).decode().strip()
+        try:
+            scratchFolderPath = freeScratchFolders.get_nowait()
+        except queue.Empty:
+            scratchFolderPath = scratchRootPath / str(next(scratchFolderIDs))
+            ensureDirExists(scratchFolderPath)
+        try:
+            inputPath = scratchFolderPath / "input"
+            outputPath = scratchFolderPath / "output"
+            answerPath = scratchFolderPath / "answer"
+            resultPath = scratchFolderPath / "result"
+            # Opening with "wb" truncates the files left by the previous check instead of recreating them.
+            for filePath, content in ((inputPath, input), (outputPath, output), (answerPath, answer)):
+                with open(filePath, "wb") as file:
+                    file.write(content)
+            resultPath.unlink(missing_ok=True)
+            command = [checkerPath.as_posix(), inputPath.as_posix(), outputPath.as_posix(), answerPath.as_posix(), resultPath.as_posix()]
+            result = runProgram(command, captureOutput=False)[0]
+            if not resultPath.exists():
+                raise FileNotFoundError("Testlib checker did not produce a result file.")
+            resultContent = readData(resultPath).decode().strip()
+        finally:
+            freeScratchFolders.put(scratchFolderPath)
         if result == 0:
             return (True, f"{resultContent} (Code {result})")
         elif result == 3:
@@ -84,17 +250,29 @@ def builtinTestlibCheckerActivate(args: dict) -> checkerType:
 
 
 def builtinTestlibCheckerDeactivate(args: dict) -> None:
-    dataFolderPath = DATA_FOLDER_PATH / "testlibCheckerCache"
-    shutil.rmtree(dataFolderPath, ignore_errors=True)
+    # The compiled checker and its build cache are kept for the next run.
+    global testlibScratchRootPath
+    if testlibScratchRootPath is not None:
+        shutil.rmtree(testlibScratchRootPath, ignore_errors=True)
+        testlibScratchRootPath = None
 
 
 BUILTIN = [
     ("builtin_basic", builtinBasicCheckerActivate, emptyDeactivate),
     ("builtin_always_ac", builtinAlwaysACCheckerActivate, emptyDeactivate),
+    ("builtin_tokens", builtinTokensCheckerActivate, emptyDeactivate),
     ("builtin_testlib", builtinTestlibCheckerActivate, builtinTestlibCheckerDeactivate),
 ]
 
 
+def isBuiltinChecker(checkerFolder: pathlib.Path, checkerName: str) -> bool:
+    """
+    Built-in checkers can be called from several workers at once and accept memory-mapped data.
+    Custom checkers are not required to allow either.
+    """
+    return not (checkerFolder / f"{checkerName}.py").exists() and checkerName in (name for name, _, _ in BUILTIN)
+
+
 """
 Checker 中的 activate 函数签名为 (dict) -> Callable[[bytes, bytes, bytes, dict], tuple[bool, str]]
 即接受 args 返回 checker 函数
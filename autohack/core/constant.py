@@ -7,10 +7,69 @@ DEFAULT_CONFIG: dict[str, Any] = {
     # MiB
     "memory_limit": 256,
     "error_data_number_limit": 1,
+    # Number of data processed at the same time. Can be overridden by --jobs.
+    "workers": 1,
+    # Reuse compiled binaries from .autohack/compileCache when nothing they depend on changed.
+    "compile_cache": True,
+    # Pass data between the programs through files in the scratch folder instead of keeping it in memory. For very large data.
+    "streaming": False,
+    # Reuse answers of std for inputs it has already answered, across sessions. Only correct if std is deterministic.
+    "answer_cache": {
+        "enabled": False,
+        # MiB
+        "max_size": 64,
+    },
+    # Skip inputs that were already generated in this session.
+    "deduplicate": {
+        "enabled": False,
+        # MiB, memory used to remember the inputs. More memory makes wrongly skipped inputs rarer.
+        "memory": 16,
+    },
+    # Seeds passed to the generator through $(seed) in its run command. Data N gets start + (N - 1) * step, modulo 2^31.
+    # Split the seeds between runs by giving them different starts and the same step, e.g. start 1..K with step K.
+    "seed": {
+        # 0: pick a random start for each session.
+        "start": 0,
+        "step": 1,
+    },
+    # Pack several generated cases into one run of std and source, for problems whose input starts with the number of cases.
+    # The generator prints a single case without the count.
+    "batch": {
+        # 1: no batching.
+        "size": 1,
+        # Put before the cases of a batch. $(count) is replaced by the number of cases.
+        "header": "$(count)\n",
+        # Every case ends with a line equal to output_separator. Empty: every case prints output_lines lines instead.
+        "output_lines": 1,
+        "output_separator": "",
+    },
+    # Pack the error data of a session into one compressed file (data.pack, with data.index) instead of separate files.
+    # autohack --export SESSION [ID ...] writes them back in the layout of paths.
+    "archive": {
+        "enabled": False,
+        # none, zlib or lzma
+        "compression": "zlib",
+    },
+    # Keep the slowest and the most memory-heavy data even when they pass, for time and memory limit hacks.
+    # They are saved to performance/time and performance/memory in the data folder of the session.
+    # Batching is turned off in this mode, since a data in a batch only gets a share of the batch time.
+    "performance": {
+        "enabled": False,
+        # Number of data kept for each measure.
+        "keep": 10,
+    },
+    # Write per-stage latencies and data counts to .autohack/metrics/metrics.json and metrics.prom (Prometheus text format).
+    "metrics": {
+        "enabled": False,
+        # Seconds between writes.
+        "interval": 10,
+    },
     "paths": {
         "input": "$(id)/input",
         "answer": "$(id)/answer",
         "output": "$(id)/output",
+        # Only written when the generator command contains $(seed).
+        "seed": "$(id)/seed",
     },
     "commands": {
         "compile": {
@@ -62,9 +121,13 @@ CONFIG_VALIDATION_EXCLUDE = ["checker.args"]
 
 DEFAULT_GLOBAL_CONFIG = {
     "language": "en_US",
-    "refresh_speed": 10,
+    # Redraws of the status per second.
+    "refresh_rate": 10,
     "wait_time_before_start": 3,
     "data_folder_max_size": 256,  # MB
+    # What to do when the hack data storage folder grows over data_folder_max_size: none (only warn),
+    # oldest or largest (remove such sessions first until it fits). The current session is never removed.
+    "data_folder_eviction": "none",
 }
 
 # empty: For developers to test missing translations.
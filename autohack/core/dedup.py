@@ -0,0 +1,41 @@
+import threading, hashlib, pathlib
+
+# Bits set per fingerprint in the Bloom filter.
+BLOOM_FILTER_HASH_COUNT = 7
+
+
+class DuplicateFilter:
+    """
+    Remembers the inputs seen in this session in a Bloom filter of a fixed size.
+    A new input is reported as a duplicate with a small probability that grows with the number of inputs;
+    about 0.2% after 10 million inputs in 16 MiB.
+    """
+
+    def __init__(self, memorySize: int) -> None:
+        self.bits = bytearray(max(1, memorySize))
+        self.bitCount = len(self.bits) * 8
+        self.lock = threading.Lock()
+
+    def getPositions(self, fingerprint: bytes) -> list[int]:
+        # Double hashing: the positions are first + i * second.
+        first, second = int.from_bytes(fingerprint[:8], "little"), int.from_bytes(fingerprint[8:], "little") | 1
+        return [(first + i * second) % self.bitCount for i in range(BLOOM_FILTER_HASH_COUNT)]
+
+    def add(self, fingerprint: bytes) -> bool:
+        """Adds the fingerprint. Returns False if it was (probably) added before."""
+        positions = self.getPositions(fingerprint)
+        with self.lock:
+            seen = all(self.bits[position >> 3] & (1 << (position & 7)) for position in positions)
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+        return not seen
+
+    def addData(self, dataInput: bytes) -> bool:
+        return self.add(hashlib.blake2b(dataInput, digest_size=16).digest())
+
+    def addFile(self, inputFilePath: pathlib.Path) -> bool:
+        fingerprint = hashlib.blake2b(digest_size=16)
+        with open(inputFilePath, "rb") as inputFile:
+            for chunk in iter(lambda: inputFile.read(1 << 20), b""):
+                fingerprint.update(chunk)
+        return self.add(fingerprint.digest())
@@ -0,0 +1,25 @@
+import heapq
+
+
+class Leaderboard:
+    """The data with the highest values of a measure, such as CPU time, kept in a min-heap of at most size entries."""
+
+    def __init__(self, size: int) -> None:
+        self.size = max(1, size)
+        self.heap: list[tuple[float, int]] = []
+
+    def offer(self, value: float, dataID: int) -> tuple[bool, int | None]:
+        """Adds the data if it ranks. Returns whether it was added, and the data it pushed out, if any."""
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, (value, dataID))
+            return True, None
+        if value <= self.heap[0][0]:
+            return False, None
+        return True, heapq.heapreplace(self.heap, (value, dataID))[1]
+
+    def entries(self) -> list[tuple[float, int]]:
+        """From the highest value."""
+        return sorted(self.heap, reverse=True)
+
+    def top(self) -> tuple[float, int] | None:
+        return max(self.heap) if self.heap else None
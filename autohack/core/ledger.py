@@ -0,0 +1,67 @@
+from autohack.core.util import *
+import pathlib, shutil, json, os
+
+LEDGER_FILE_NAME = "ledger.json"
+
+EVICTION_POLICIES = ["none", "oldest", "largest"]
+
+
+class StorageLedger:
+    """
+    Sizes of the sessions in the hack data storage folder, kept in a ledger file next to them so that nothing is walked at exit.
+    Sessions record their own size as they write. A session folder missing from the ledger, e.g. from an older version, is measured once.
+    """
+
+    def __init__(self, folderPath: pathlib.Path) -> None:
+        self.folderPath = folderPath
+        self.ledgerFilePath = folderPath / LEDGER_FILE_NAME
+        self.sessions: dict[str, int] = {}
+
+    def load(self) -> None:
+        try:
+            sessions = json.loads(readData(self.ledgerFilePath)).get("sessions", {})
+        except (OSError, ValueError, AttributeError):
+            sessions = {}
+        try:
+            with os.scandir(self.folderPath) as entries:
+                folderNames = {entry.name for entry in entries if entry.is_dir()}
+        except FileNotFoundError:
+            folderNames = set()
+        # Folders removed by hand leave the ledger, new ones join it. Sizes set before loading are kept.
+        knownSessions = self.sessions
+        self.sessions = {name: size for name, size in sessions.items() if name in folderNames and isinstance(size, int)}
+        self.sessions.update({name: size for name, size in knownSessions.items() if name in folderNames})
+        for name in folderNames - self.sessions.keys():
+            self.sessions[name] = getFolderSize(self.folderPath / name)
+
+    def save(self) -> None:
+        ensureDirExists(self.folderPath)
+        temporaryPath = self.ledgerFilePath.with_name(f".{LEDGER_FILE_NAME}.{os.getpid()}")
+        writeData(temporaryPath, json.dumps({"sessions": self.sessions}, indent=4).encode())
+        os.replace(temporaryPath, self.ledgerFilePath)
+
+    def setSessionSize(self, name: str, size: int) -> None:
+        self.sessions[name] = size
+
+    def totalSize(self) -> int:
+        return sum(self.sessions.values())
+
+    def evict(self, maxSize: int, policy: str, keep: set[str]) -> list[str]:
+        """Removes sessions, the oldest or the largest first, until the total size is at most maxSize. Returns the removed sessions."""
+        if policy not in EVICTION_POLICIES or policy == "none":
+            return []
+        # Session folders start with their start time, so their names sort from the oldest.
+        if policy == "oldest":
+            candidates = sorted(self.sessions)
+        else:
+            candidates = sorted(self.sessions, key=lambda name: self.sessions[name], reverse=True)
+        evicted = []
+        for name in candidates:
+            if self.totalSize() <= maxSize:
+                break
+            if name in keep:
+                continue
+            shutil.rmtree(self.folderPath / name, ignore_errors=True)
+            del self.sessions[name]
+            evicted.append(name)
+        return evicted
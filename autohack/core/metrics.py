@@ -0,0 +1,140 @@
+from autohack.core.util import *
+from typing import Iterator
+import contextlib, threading, pathlib, json, math, time, os
+
+# Quantiles of the histograms are accurate to about 9%, the width of a bucket.
+HISTOGRAM_BUCKETS_PER_DOUBLING = 8
+# Latencies from 1 microsecond to about 4.8 hours.
+HISTOGRAM_MIN_LATENCY = 1e-6
+HISTOGRAM_BUCKET_COUNT = HISTOGRAM_BUCKETS_PER_DOUBLING * 34
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """Latencies in logarithmic buckets, so memory does not grow with the number of samples."""
+
+    def __init__(self) -> None:
+        self.buckets = [0] * HISTOGRAM_BUCKET_COUNT
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float, count: int = 1) -> None:
+        if seconds <= HISTOGRAM_MIN_LATENCY:
+            bucket = 0
+        else:
+            bucket = min(HISTOGRAM_BUCKET_COUNT - 1, int(math.log2(seconds / HISTOGRAM_MIN_LATENCY) * HISTOGRAM_BUCKETS_PER_DOUBLING) + 1)
+        self.buckets[bucket] += count
+        self.count += count
+        self.sum += seconds * count
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the quantile, capped at the largest latency seen."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, bucketCount in enumerate(self.buckets):
+            seen += bucketCount
+            if seen >= rank and bucketCount > 0:
+                return min(self.max, HISTOGRAM_MIN_LATENCY * 2 ** (bucket / HISTOGRAM_BUCKETS_PER_DOUBLING))
+        return self.max
+
+    def mean(self) -> float:
+        return self.sum / self.count if self.count > 0 else 0.0
+
+
+class HackMetrics:
+    """Per-stage latencies and data counters of a session, exported as JSON and in the Prometheus text format."""
+
+    def __init__(self, clientID: str) -> None:
+        self.clientID = clientID
+        self.startTime = time.time()
+        self.lock = threading.Lock()
+        self.stages: dict[str, LatencyHistogram] = {}
+        self.counters = {"data": 0, "error_data": 0, "duplicate_data": 0}
+
+    def add(self, stage: str, seconds: float, count: int = 1) -> None:
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = LatencyHistogram()
+            self.stages[stage].add(seconds, count)
+
+    @contextlib.contextmanager
+    def measure(self, stage: str, count: int = 1) -> Iterator[None]:
+        """Times the block as one sample of the stage, or as count samples of an equal share when it handles count data at once."""
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, (time.perf_counter() - startTime) / count, count)
+
+    def setCounter(self, name: str, value: int) -> None:
+        with self.lock:
+            self.counters[name] = value
+
+    def slowestStage(self) -> tuple[str, LatencyHistogram] | None:
+        """The stage with the highest mean latency."""
+        with self.lock:
+            if not self.stages:
+                return None
+            return max(self.stages.items(), key=lambda item: item[1].mean())
+
+    def toJSON(self) -> str:
+        with self.lock:
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.mean(),
+                    **{f"p{int(q * 100)}": histogram.quantile(q) for q in QUANTILES},
+                    "max": histogram.max,
+                }
+                for stage, histogram in self.stages.items()
+            }
+            counters = dict(self.counters)
+        return json.dumps(
+            {"client_id": self.clientID, "time": time.time(), "elapsed": time.time() - self.startTime, **counters, "stages": stages}, indent=4
+        )
+
+    def toPrometheus(self) -> str:
+        label = f'client_id="{self.clientID}"'
+        lines = [
+            "# HELP autohack_stage_latency_seconds Latency of each stage of the per-data pipeline.",
+            "# TYPE autohack_stage_latency_seconds summary",
+        ]
+        with self.lock:
+            for stage, histogram in self.stages.items():
+                stageLabel = f'{label},stage="{stage}"'
+                for q in QUANTILES:
+                    lines.append(f'autohack_stage_latency_seconds{{{stageLabel},quantile="{q}"}} {histogram.quantile(q)}')
+                lines.append(f"autohack_stage_latency_seconds_sum{{{stageLabel}}} {histogram.sum}")
+                lines.append(f"autohack_stage_latency_seconds_count{{{stageLabel}}} {histogram.count}")
+            lines += [
+                "# HELP autohack_stage_latency_max_seconds Highest latency of each stage.",
+                "# TYPE autohack_stage_latency_max_seconds gauge",
+            ]
+            for stage, histogram in self.stages.items():
+                lines.append(f'autohack_stage_latency_max_seconds{{{label},stage="{stage}"}} {histogram.max}')
+            for name, value in self.counters.items():
+                lines += [
+                    f"# HELP autohack_{name}_total Number of {name.replace('_', ' ')} in this session.",
+                    f"# TYPE autohack_{name}_total counter",
+                    f"autohack_{name}_total{{{label}}} {value}",
+                ]
+        lines += [
+            "# HELP autohack_elapsed_seconds Time since the session started.",
+            "# TYPE autohack_elapsed_seconds gauge",
+            f"autohack_elapsed_seconds{{{label}}} {time.time() - self.startTime}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, jsonFilePath: pathlib.Path, prometheusFilePath: pathlib.Path) -> None:
+        # Replaced in one step, so a collector never reads a half-written file.
+        for filePath, content in ((jsonFilePath, self.toJSON()), (prometheusFilePath, self.toPrometheus())):
+            ensureDirExists(filePath.parent)
+            temporaryPath = filePath.with_name(f".{filePath.name}.{os.getpid()}")
+            writeData(temporaryPath, content.encode())
+            os.replace(temporaryPath, filePath)
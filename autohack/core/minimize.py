@@ -0,0 +1,112 @@
+from typing import Callable, Iterable
+import concurrent.futures, re
+
+TOKEN_PATTERN = re.compile(rb"\S+\s*")
+# Whole integer tokens only. Digits inside words or decimals such as 3.14 are left alone, so the token structure stays the same.
+NUMBER_PATTERN = re.compile(rb"(?<!\S)-?\d+(?!\S)")
+
+
+def splitLines(data: bytes) -> list[bytes]:
+    return data.splitlines(keepends=True)
+
+
+def splitTokens(data: bytes) -> list[bytes]:
+    """Tokens with the whitespace after them. Leading whitespace is kept as a unit of its own."""
+    tokens = TOKEN_PATTERN.findall(data)
+    leading = data[: len(data) - len(data.lstrip())]
+    return ([leading] if leading else []) + tokens
+
+
+def firstFailing(candidates: Iterable[bytes], test: Callable[[bytes], bool], executor: concurrent.futures.Executor, windowSize: int) -> int | None:
+    """
+    Tests the candidates in parallel and returns the index of the first one that still fails, in order, so results do not depend on timing.
+    Candidates are taken from the iterable as tests finish, at most windowSize at a time, so only that many are built at once.
+    """
+    candidateIterator = iter(candidates)
+    futures: list[concurrent.futures.Future[bool]] = []
+    firstIndex = 0
+    try:
+        while True:
+            for candidate in candidateIterator:
+                futures.append(executor.submit(test, candidate))
+                if len(futures) >= windowSize:
+                    break
+            if len(futures) == 0:
+                return None
+            if futures.pop(0).result():
+                return firstIndex
+            firstIndex += 1
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def ddmin(units: list[bytes], test: Callable[[bytes], bool], executor: concurrent.futures.Executor, windowSize: int) -> list[bytes]:
+    """Delta debugging: removes chunks of units, halving their size, as long as what is left still fails."""
+    granularity = 2
+    while len(units) >= 2:
+        granularity = min(granularity, len(units))
+        chunkSize = -(-len(units) // granularity)
+        chunks = [(start, min(start + chunkSize, len(units))) for start in range(0, len(units), chunkSize)]
+        # Complements first, then subsets, each joined only when it is about to be tested.
+        candidateCount = len(chunks) * 2 if len(chunks) > 2 else len(chunks)
+
+        def candidateUnits(index: int) -> list[bytes]:
+            if index < len(chunks):
+                return units[: chunks[index][0]] + units[chunks[index][1] :]
+            start, end = chunks[index - len(chunks)]
+            return units[start:end]
+
+        index = firstFailing((b"".join(candidateUnits(index)) for index in range(candidateCount)), test, executor, windowSize)
+        if index is not None and index < len(chunks):
+            units, granularity = candidateUnits(index), max(granularity - 1, 2)
+        elif index is not None:
+            units, granularity = candidateUnits(index), 2
+        elif granularity >= len(units):
+            break
+        else:
+            granularity = min(granularity * 2, len(units))
+    return units
+
+
+def shrinkNumbers(data: bytes, test: Callable[[bytes], bool], executor: concurrent.futures.Executor, windowSize: int) -> bytes:
+    """Moves every integer towards 0 while the input still fails, trying a few smaller values of it at once."""
+    position = 0
+    # Values already tried for the number being shrunk, so that none is tested twice.
+    tried: set[int] = set()
+    while True:
+        match = NUMBER_PATTERN.search(data, position)
+        if match is None:
+            return data
+        value = int(match.group())
+        tried.add(value)
+        sign = -1 if value < 0 else 1
+        candidateValues = [
+            sign * candidateValue for candidateValue in sorted({0, 1, abs(value) // 2, abs(value) - 1}) if 0 <= candidateValue < abs(value)
+        ]
+        candidateValues = [candidateValue for candidateValue in candidateValues if candidateValue not in tried]
+        tried.update(candidateValues)
+        candidates = [data[: match.start()] + str(candidateValue).encode() + data[match.end() :] for candidateValue in candidateValues]
+        index = firstFailing(candidates, test, executor, windowSize)
+        if index is not None:
+            # Try to shrink the same number further.
+            data = candidates[index]
+            continue
+        position = match.end()
+        tried.clear()
+
+
+def minimizeInput(data: bytes, test: Callable[[bytes], bool], workerCount: int, onProgress: Callable[[str, int], None] | None = None) -> bytes:
+    """Shrinks a failing input by lines, then tokens, then numbers, until a whole round changes nothing. test must be thread-safe."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workerCount) as executor:
+        while True:
+            previous = data
+            for level, split in (("line", splitLines), ("token", splitTokens)):
+                data = b"".join(ddmin(split(data), test, executor, workerCount))
+                if onProgress is not None:
+                    onProgress(level, len(data))
+            data = shrinkNumbers(data, test, executor, workerCount)
+            if onProgress is not None:
+                onProgress("number", len(data))
+            if data == previous:
+                return data
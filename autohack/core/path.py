@@ -13,12 +13,28 @@ EXPORT_FOLDER_PATH = DATA_FOLDER_PATH / "export"
 
 LOG_FOLDER_PATH = DATA_FOLDER_PATH / "logs"
 
+SCRATCH_FOLDER_PATH = DATA_FOLDER_PATH / "scratch"
+
+COMPILE_CACHE_FOLDER_PATH = DATA_FOLDER_PATH / "compileCache"
+
+TESTLIB_CHECKER_CACHE_FOLDER_PATH = DATA_FOLDER_PATH / "testlibCheckerCache"
+
+ANSWER_CACHE_FOLDER_PATH = DATA_FOLDER_PATH / "answerCache"
+
+METRICS_FOLDER_PATH = DATA_FOLDER_PATH / "metrics"
+
 CONFIG_FILE_PATH = DATA_FOLDER_PATH / "config.json"
 
 GLOBAL_DATA_FOLDER_PATH = pathlib.Path(dirs.user_data_dir)
 
 GLOBAL_CONFIG_FILE_PATH = GLOBAL_DATA_FOLDER_PATH / "config.json"
 
+# Parsed config and translation files, as plain JSON.
+PARSE_CACHE_FOLDER_PATH = GLOBAL_DATA_FOLDER_PATH / "parseCache"
+
+# RAM-backed folder for short-lived scratch files, if the system has one we can write to.
+MEMORY_FOLDER_PATH = pathlib.Path("/dev/shm") if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
 TRANSLATION_FOLDER_PATH = pathlib.Path(__file__).parent.parent / "i18n"
 
 
@@ -30,6 +46,18 @@ def getHackDataFilePath(hackDataStorageFolder: pathlib.Path, dataID: int, filePa
     return hackDataStorageFolder / filePath.replace("$(id)", str(dataID))
 
 
+def getPerformanceFolderPath(hackDataStorageFolder: pathlib.Path, measure: str) -> pathlib.Path:
+    return hackDataStorageFolder / "performance" / measure
+
+
+def getScratchFolderPath(clientID: str, startTime: time.struct_time) -> pathlib.Path:
+    return SCRATCH_FOLDER_PATH / f"{formatTime(startTime)}_{clientID}"
+
+
+def getWorkerScratchFolderPath(scratchFolder: pathlib.Path, workerID: int, stage: str) -> pathlib.Path:
+    return scratchFolder / f"worker-{workerID}" / stage
+
+
 def getExportFolderPath(startTime: time.struct_time, clientID: str | None = None) -> pathlib.Path:
     if clientID is None:
         return EXPORT_FOLDER_PATH / formatTime(startTime)
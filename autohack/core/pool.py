@@ -0,0 +1,191 @@
+from autohack.core.run import *
+from autohack.core.util import *
+from typing import Callable, Iterator, cast
+import threading, pathlib, queue, mmap
+
+# Stage names, also used for the per-stage scratch folders.
+PREPARE_STAGE = "prepare"
+JUDGE_STAGE = "judge"
+
+
+class HackData:
+    def __init__(self, dataID: int, workerID: int) -> None:
+        self.dataID = dataID
+        self.workerID = workerID
+        self.input = b""
+        # Seed given to the generator, in seeded mode.
+        self.seed: int | None = None
+        self.answer = b""
+        self.result: CodeRunner.Result | None = None
+        self.checkerResult: tuple[bool, str] | None = None
+        self.checkerError: str | None = None
+        self.checkerTraceback: str | None = None
+        # "input" or "answer" when the generator or std failed, together with the error raised.
+        self.failedStage: str | None = None
+        self.failedError: autohackRuntimeError | None = None
+        # The same input was already generated in this session. Duplicate data are not judged.
+        self.duplicate = False
+        # Files behind input, answer and output in streaming mode, and their memory mappings.
+        self.filePaths: list[pathlib.Path] = []
+        self.mappings: list[mmap.mmap] = []
+        # In batching mode: the generated case without the count header, and for the batches the pool passes around, the cases they pack.
+        self.caseInput = b""
+        self.cases: list["HackData"] = []
+
+    def needsJudging(self) -> bool:
+        if self.cases:
+            return any(case.needsJudging() for case in self.cases)
+        return self.failedStage is None and not self.duplicate
+
+    def mapFile(self, filePath: pathlib.Path) -> bytes:
+        """
+        Maps a file produced for this data into memory instead of reading it.
+        The mapping supports the read-only bytes operations (slicing, find, buffer protocol) the built-in checkers use.
+        """
+        self.filePaths.append(filePath)
+        mapping = mapData(filePath)
+        if mapping is None:
+            return b""
+        self.mappings.append(mapping)
+        return cast(bytes, mapping)
+
+    def release(self) -> None:
+        """Closes the mappings and removes the files of this data."""
+        for mapping in self.mappings:
+            mapping.close()
+        for filePath in self.filePaths:
+            filePath.unlink(missing_ok=True)
+        self.mappings.clear()
+        self.filePaths.clear()
+
+
+class HackWorkerPool:
+    """
+    Runs the per-data pipeline on several workers.
+    Every worker has a prepare thread (generator and std) and a judge thread (source and checker),
+    connected by a bounded queue, so the next data is prepared while the current one is judged.
+    Data IDs are handed out in increasing order and results are returned in the same order,
+    so error numbering does not depend on which worker finishes first.
+    """
+
+    # Seconds between checks of the stop flag while waiting on the queue.
+    POLL_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        workerCount: int,
+        prepareTask: Callable[[int, int], HackData],
+        judgeTask: Callable[[int, HackData], HackData],
+        maximumDataLimit: int,
+    ) -> None:
+        self.workerCount = max(1, workerCount)
+        self.prepareTask = prepareTask
+        self.judgeTask = judgeTask
+        self.maximumDataLimit = maximumDataLimit
+        self.prepared: queue.Queue[HackData] = queue.Queue(maxsize=self.workerCount)
+        # Workers may not run further ahead of the committed data than this:
+        # one data being prepared, one queued and one being judged per worker.
+        self.window = self.workerCount * 3
+        self.condition = threading.Condition()
+        self.nextDataID = 1
+        self.nextCommitID = 1
+        self.finished: dict[int, tuple[HackData | None, BaseException | None]] = {}
+        self.stopped = False
+        self.preparingWorkers = 0
+        self.activeWorkers = 0
+        self.threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self.preparingWorkers = self.workerCount
+        self.activeWorkers = self.workerCount * 2
+        for workerID in range(1, self.workerCount + 1):
+            for target in (self.prepareLoop, self.judgeLoop):
+                thread = threading.Thread(target=target, args=(workerID,), daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def takeDataID(self) -> int | None:
+        with self.condition:
+            while not self.stopped and self.nextDataID >= self.nextCommitID + self.window:
+                self.condition.wait()
+            if self.stopped or (self.maximumDataLimit > 0 and self.nextDataID > self.maximumDataLimit):
+                return None
+            dataID = self.nextDataID
+            self.nextDataID += 1
+            return dataID
+
+    def finish(self, dataID: int, data: HackData | None, error: BaseException | None) -> None:
+        with self.condition:
+            self.finished[dataID] = (data, error)
+            self.condition.notify_all()
+
+    def prepareLoop(self, workerID: int) -> None:
+        try:
+            while True:
+                dataID = self.takeDataID()
+                if dataID is None:
+                    return
+                try:
+                    data = self.prepareTask(workerID, dataID)
+                except BaseException as e:
+                    self.finish(dataID, None, e)
+                    continue
+                # Data whose generator or std failed, and duplicate data, have nothing left to judge.
+                if not data.needsJudging():
+                    self.finish(dataID, data, None)
+                    continue
+                while not self.stopped:
+                    try:
+                        self.prepared.put(data, timeout=self.POLL_INTERVAL)
+                        break
+                    except queue.Full:
+                        pass
+        finally:
+            with self.condition:
+                self.preparingWorkers -= 1
+                self.activeWorkers -= 1
+                self.condition.notify_all()
+
+    def judgeLoop(self, workerID: int) -> None:
+        try:
+            while not self.stopped:
+                try:
+                    data = self.prepared.get(timeout=self.POLL_INTERVAL)
+                except queue.Empty:
+                    if self.preparingWorkers == 0 and self.prepared.empty():
+                        return
+                    continue
+                try:
+                    self.finish(data.dataID, self.judgeTask(workerID, data), None)
+                except BaseException as e:
+                    self.finish(data.dataID, None, e)
+        finally:
+            with self.condition:
+                self.activeWorkers -= 1
+                self.condition.notify_all()
+
+    def results(self) -> Iterator[tuple[int, HackData]]:
+        """Yields (dataID, data) in data order. Exceptions raised by the tasks are re-raised here."""
+        while True:
+            with self.condition:
+                while self.nextCommitID not in self.finished:
+                    if self.stopped or self.activeWorkers == 0:
+                        return
+                    self.condition.wait()
+                dataID = self.nextCommitID
+                data, error = self.finished.pop(dataID)
+                self.nextCommitID += 1
+                self.condition.notify_all()
+            if error is not None:
+                raise error
+            yield (dataID, cast(HackData, data))
+
+    def stop(self) -> None:
+        """Stops handing out data and waits for the data being processed. Their results are discarded."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        self.finished.clear()
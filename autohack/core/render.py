@@ -0,0 +1,67 @@
+from autohack.core.util import *
+from typing import Callable
+import unicodedata, threading, shutil, sys
+
+
+def fitWidth(text: str, columns: int) -> str:
+    """Cuts the text to the columns of the terminal, counting wide characters twice, so that a live line never wraps."""
+    width = 0
+    for index, char in enumerate(text):
+        width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+        if width > columns:
+            return text[:index]
+    return text
+
+
+class StatusRenderer:
+    """
+    Draws the two live lines below the error data from its own thread: the latest activity of the workers and the status.
+    Workers only store their activity, and the lines are redrawn at a fixed frame rate with one write per frame,
+    so fast data do not flood the terminal and the status keeps moving while a slow program runs.
+    The cursor stays on the activity line between frames.
+    """
+
+    def __init__(self, frameRate: float, renderStatus: Callable[[], str]) -> None:
+        self.frameInterval = 1 / max(frameRate, 0.1)
+        self.renderStatus = renderStatus
+        self.activity = ""
+        self.lastFrame: str | None = None
+        self.stopEvent = threading.Event()
+        self.thread = threading.Thread(target=self.renderLoop, name="autohack-renderer", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stops redrawing and leaves the cursor on the activity line."""
+        self.stopEvent.set()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def setActivity(self, message: str) -> None:
+        self.activity = message
+
+    def writeLines(self, lines: list[str]) -> None:
+        """Writes lines that stay above the live lines, and redraws them below."""
+        with OUTPUT_LOCK:
+            sys.stdout.write("".join(f"\x1b[2K\r{line}\n" for line in lines))
+            self.lastFrame = None
+            if not self.stopEvent.is_set():
+                self.draw()
+            else:
+                sys.stdout.flush()
+
+    def draw(self) -> None:
+        # The cursor only moves up one line, so each live line must fit in one.
+        columns = shutil.get_terminal_size().columns - 1
+        frame = f"\x1b[2K\r{fitWidth(self.activity, columns)}\n\x1b[2K\r{fitWidth(self.renderStatus(), columns)}\x1b[1A\r"
+        with OUTPUT_LOCK:
+            if frame != self.lastFrame:
+                sys.stdout.write(frame)
+                sys.stdout.flush()
+                self.lastFrame = frame
+
+    def renderLoop(self) -> None:
+        while not self.stopEvent.is_set():
+            self.draw()
+            self.stopEvent.wait(self.frameInterval)
@@ -0,0 +1,32 @@
+from typing import Any, TextIO
+import json, time, sys, os
+
+
+class ResultStream:
+    """
+    Results as JSON lines, one object per event, for tools that drive autohack from scripts.
+    Every line is flushed when it is written, so results can be followed as they arrive. Without a file, nothing is written.
+    """
+
+    def __init__(self, file: TextIO | None) -> None:
+        self.file = file
+
+    def emit(self, event: str, **fields: Any) -> None:
+        if self.file is None:
+            return
+        try:
+            self.file.write(json.dumps({"event": event, "timestamp": time.time(), **fields}, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self.file.flush()
+        except BrokenPipeError:
+            # The reader went away, e.g. `| head`. The run goes on without results. stdout is pointed at the null device,
+            # so that flushing it again at exit does not fail too.
+            if self.file is sys.stdout:
+                nullFd = os.open(os.devnull, os.O_WRONLY)
+                os.dup2(nullFd, sys.stdout.fileno())
+                os.close(nullFd)
+            self.file = None
+
+    def close(self) -> None:
+        if self.file is not None and self.file is not sys.stdout:
+            self.file.close()
+        self.file = None
@@ -1,5 +1,373 @@
 from autohack.core.exception import *
-import subprocess, threading, psutil, time
+from typing import Any, BinaryIO, Callable
+import subprocess, contextlib, threading, pathlib, select, signal, time, math, sys, os
+
+try:
+    import resource
+except ModuleNotFoundError:
+    resource = None
+
+# Programs are killed as soon as they are seen over the time limit in CPU time or over the memory limit in peak RSS,
+# and after running this many times the time limit in wall time, e.g. when sleeping or blocked on input.
+WALL_TIME_LIMIT_FACTOR = 2
+
+# A running program is checked after this many seconds, then at doubling intervals up to the maximum.
+WATCH_MIN_INTERVAL = 0.0005
+WATCH_MAX_INTERVAL = 0.02
+
+
+class RusagePopen(subprocess.Popen):
+    """Popen which reaps the child with wait4, keeping its resource usage."""
+
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        try:
+            pid, sts, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return (self.pid, 0)
+        if pid == self.pid:
+            self.rusage = rusage
+        return (pid, sts)
+
+
+class CgroupBackend:
+    """Runs every program in its own cgroup v2 group, so the kernel enforces the memory limit and reports OOM kills."""
+
+    def __init__(self, rootPath: pathlib.Path) -> None:
+        self.rootPath = rootPath
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def detect() -> "CgroupBackend | None":
+        # Usable when our own cgroup delegates the memory controller to children we are allowed to create.
+        try:
+            mountPoint = next(line.split()[1] for line in open("/proc/self/mounts") if line.split()[2] == "cgroup2")
+            cgroupPath = next(line.strip()[3:] for line in open("/proc/self/cgroup") if line.startswith("0::"))
+            rootPath = pathlib.Path(mountPoint) / cgroupPath.lstrip("/")
+            if "memory" not in (rootPath / "cgroup.subtree_control").read_text().split():
+                return None
+        except (OSError, StopIteration, IndexError):
+            return None
+        if not os.access(rootPath, os.W_OK):
+            return None
+        return CgroupBackend(rootPath)
+
+    def create(self, memoryLimit: int | None) -> pathlib.Path | None:
+        with self.lock:
+            self.counter += 1
+            groupPath = self.rootPath / f"autohack-{os.getpid()}-{self.counter}"
+        try:
+            groupPath.mkdir()
+            if memoryLimit is not None:
+                (groupPath / "memory.max").write_text(str(memoryLimit))
+                (groupPath / "memory.swap.max").write_text("0")
+        except OSError:
+            self.remove(groupPath)
+            return None
+        return groupPath
+
+    def attach(self, groupPath: pathlib.Path, pid: int) -> None:
+        (groupPath / "cgroup.procs").write_text(str(pid))
+
+    def collect(self, groupPath: pathlib.Path) -> tuple[int | None, bool]:
+        """Returns the peak memory usage (None if the kernel does not report it) and whether an OOM kill happened."""
+        peak = None
+        oomKilled = False
+        try:
+            peak = int((groupPath / "memory.peak").read_text())
+        except (OSError, ValueError):
+            pass
+        try:
+            for line in (groupPath / "memory.events").read_text().splitlines():
+                key, value = line.split()
+                if key == "oom_kill" and int(value) > 0:
+                    oomKilled = True
+        except (OSError, ValueError):
+            pass
+        return (peak, oomKilled)
+
+    def remove(self, groupPath: pathlib.Path) -> None:
+        try:
+            groupPath.rmdir()
+        except OSError:
+            pass
+
+
+# wait4 gives user+sys CPU time and peak RSS of the child without polling it.
+KERNEL_ACCOUNTING = hasattr(os, "wait4")
+
+# prlimit lets us set limits on the child without a preexec_fn, which is unsafe with worker threads.
+KERNEL_LIMITS = resource is not None and hasattr(resource, "prlimit")
+
+CGROUP_BACKEND = CgroupBackend.detect() if KERNEL_ACCOUNTING else None
+
+# posix_spawn starts programs from a vfork-like clone without Popen's bookkeeping, and the pipes are served by poll in the calling thread.
+SPAWN_LAUNCHER = KERNEL_ACCOUNTING and hasattr(os, "posix_spawnp") and hasattr(select, "poll")
+
+# Signals Python ignores that programs expect at their defaults, as with Popen's restore_signals.
+RESTORED_SIGNALS = tuple(getattr(signal, name) for name in ("SIGPIPE", "SIGXFZ", "SIGXFSZ") if hasattr(signal, name))
+
+PIPE_CHUNK_SIZE = 1 << 16
+
+try:
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = 100
+
+# On Linux, exec keeps the larger of the peak RSS of the old memory, which a vfork or fork child shares with or copies from us,
+# and the peak of the program, so wait4 never reports a peak below ours. Our peak is reset to our current RSS right before
+# every measured spawn, and read right after it; a wait4 peak at or below that floor cannot be told apart from ours, and the peak
+# seen by the watch of the program is used instead. The lock keeps other spawns from resetting the peak in between.
+SPAWN_LOCK = threading.Lock()
+
+
+def readProcessUsage(pid: int) -> tuple[float | None, int | None]:
+    """Returns the CPU time and the peak RSS (VmHWM) of a running process, None where they cannot be read, e.g. once it has exited."""
+    cpuTime = None
+    peakMemory = None
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as statFile:
+            # The fields after the command name, which may contain spaces, start with the state. utime and stime follow at 12 and 13.
+            fields = statFile.read().rsplit(b")", 1)[1].split()
+            cpuTime = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        with open(f"/proc/{pid}/status", "rb") as statusFile:
+            for line in statusFile:
+                if line.startswith(b"VmHWM:"):
+                    peakMemory = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+    return (cpuTime, peakMemory)
+
+
+class ProcessWatch:
+    """Calls check with the pid of a running program at growing intervals. check returns True when the program must be killed."""
+
+    def __init__(self, pid: int, check: Callable[[int], bool]) -> None:
+        self.pid = pid
+        self.check = check
+        self.interval = WATCH_MIN_INTERVAL
+        self.nextTime = time.monotonic() + self.interval
+
+    def due(self) -> bool:
+        """Runs the check if its time has come. Returns whether the program must be killed."""
+        if time.monotonic() < self.nextTime:
+            return False
+        self.interval = min(self.interval * 2, WATCH_MAX_INTERVAL)
+        self.nextTime = time.monotonic() + self.interval
+        return self.check(self.pid)
+
+
+def getWaitTime(deadline: float | None, watch: ProcessWatch | None) -> float | None:
+    """Seconds until the deadline or the next check of the watch, whichever comes first. None without both."""
+    times = [wakeTime for wakeTime in (deadline, None if watch is None else watch.nextTime) if wakeTime is not None]
+    return None if len(times) == 0 else max(0.0, min(times) - time.monotonic())
+
+
+def resetPeakMemory() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as clearRefsFile:
+            clearRefsFile.write("5")
+    except OSError:
+        pass
+
+
+def getPeakMemory() -> int | None:
+    try:
+        with open("/proc/self/status", "rb") as statusFile:
+            for line in statusFile:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def killProcess(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGKILL)
+        os.wait4(pid, 0)
+    except (ProcessLookupError, ChildProcessError):
+        pass
+
+
+def waitProcess(pid: int, deadline: float | None, watch: ProcessWatch | None = None) -> tuple[int, Any, bool]:
+    """Reaps the process, killing it at the deadline or when the watch asks for it. Returns its wait status, resource usage and whether it was killed."""
+    if deadline is not None or watch is not None:
+        try:
+            pidFd = os.pidfd_open(pid)  # type: ignore
+        except (AttributeError, OSError):
+            pidFd = None
+        try:
+            delay = 0.0005
+            while True:
+                waitedPid, status, rusage = os.wait4(pid, os.WNOHANG)
+                if waitedPid == pid:
+                    return (status, rusage, False)
+                if deadline is not None and deadline - time.monotonic() <= 0:
+                    break
+                if watch is not None and watch.due():
+                    break
+                remaining = getWaitTime(deadline, watch)
+                if pidFd is not None:
+                    select.select([pidFd], [], [], remaining)
+                else:
+                    time.sleep(delay if remaining is None else min(delay, remaining))
+                    delay = min(delay * 2, 0.05)
+        finally:
+            if pidFd is not None:
+                os.close(pidFd)
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        _, status, rusage = os.wait4(pid, 0)
+        return (status, rusage, True)
+    _, status, rusage = os.wait4(pid, 0)
+    return (status, rusage, False)
+
+
+def exchangeData(
+    pid: int, inputFd: int | None, outputFd: int | None, inputContent: bytes, deadline: float | None, watch: ProcessWatch | None = None
+) -> tuple[bytes, bool]:
+    """
+    Writes the input to and reads the output from the pipes of the process until it closes them.
+    The process is killed at the deadline, or when the watch asks for it.
+    """
+    poller = select.poll()
+    if inputFd is not None:
+        if len(inputContent) == 0:
+            os.close(inputFd)
+            inputFd = None
+        else:
+            os.set_blocking(inputFd, False)
+            poller.register(inputFd, select.POLLOUT)
+    if outputFd is not None:
+        poller.register(outputFd, select.POLLIN)
+    inputView, inputOffset = memoryview(inputContent), 0
+    outputChunks: list[bytes] = []
+    killed = False
+    try:
+        while inputFd is not None or outputFd is not None:
+            timeout = None
+            if not killed:
+                if (deadline is not None and deadline - time.monotonic() <= 0) or (watch is not None and watch.due()):
+                    # Closing the pipes after the kill is left to the loop, so output written so far is still read.
+                    killed = True
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    continue
+                timeout = getWaitTime(deadline, watch)
+            for fd, _ in poller.poll(None if timeout is None else timeout * 1000):
+                if fd == outputFd:
+                    chunk = os.read(fd, PIPE_CHUNK_SIZE)
+                    if chunk:
+                        outputChunks.append(chunk)
+                        continue
+                    poller.unregister(fd)
+                    os.close(fd)
+                    outputFd = None
+                elif fd == inputFd:
+                    try:
+                        inputOffset += os.write(fd, inputView[inputOffset : inputOffset + PIPE_CHUNK_SIZE])
+                    except BlockingIOError:
+                        continue
+                    except BrokenPipeError:
+                        # The program stopped reading its input.
+                        inputOffset = len(inputView)
+                    if inputOffset >= len(inputView):
+                        poller.unregister(fd)
+                        os.close(fd)
+                        inputFd = None
+    finally:
+        for fd in (inputFd, outputFd):
+            if fd is not None:
+                os.close(fd)
+    return (b"".join(outputChunks), killed)
+
+
+def launchProcess(
+    command: list,
+    env: dict[str, str] | None = None,
+    inputContent: bytes | None = None,
+    inputFd: int | None = None,
+    outputFd: int | None = None,
+    captureOutput: bool = True,
+    timeout: float | None = None,
+    onSpawn: Callable[[int], None] | None = None,
+    check: Callable[[int], bool] | None = None,
+) -> tuple[int, bytes | None, Any, bool]:
+    """
+    Runs a program with posix_spawn. stderr goes to the null device.
+    stdin is a pipe fed with inputContent, inputFd, or inherited when both are None.
+    stdout is outputFd, a pipe whose content is returned when captureOutput is set, or the null device.
+    check is called with the pid while the program runs, which is killed when it returns True.
+    Returns the return code (negative for signals, as with Popen), the output, the resource usage and whether the program was killed.
+    """
+    fileActions: list[tuple] = []
+    parentFds: list[int] = []
+    childFds: list[int] = []
+    try:
+        stdinWriteFd = None
+        if inputContent is not None:
+            stdinReadFd, stdinWriteFd = os.pipe()
+            parentFds.append(stdinWriteFd)
+            childFds.append(stdinReadFd)
+            fileActions.append((os.POSIX_SPAWN_DUP2, stdinReadFd, 0))
+        elif inputFd is not None:
+            fileActions.append((os.POSIX_SPAWN_DUP2, inputFd, 0))
+        stdoutReadFd = None
+        if outputFd is not None:
+            fileActions.append((os.POSIX_SPAWN_DUP2, outputFd, 1))
+        elif captureOutput:
+            stdoutReadFd, stdoutWriteFd = os.pipe()
+            parentFds.append(stdoutReadFd)
+            childFds.append(stdoutWriteFd)
+            fileActions.append((os.POSIX_SPAWN_DUP2, stdoutWriteFd, 1))
+        else:
+            fileActions.append((os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0))
+        fileActions.append((os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0))
+        # Only measured spawns reset our peak, so only they need the lock; other spawns run in parallel.
+        with SPAWN_LOCK if onSpawn is not None else contextlib.nullcontext():
+            if onSpawn is not None:
+                resetPeakMemory()
+            # The pipes are created non-inheritable, and dup2 makes the copies on 0 and 1 inheritable in the program only.
+            pid = os.posix_spawnp(
+                str(command[0]),
+                [str(arg) for arg in command],
+                os.environ if env is None else env,
+                file_actions=fileActions,
+                setsigdef=RESTORED_SIGNALS,
+            )
+            try:
+                if onSpawn is not None:
+                    onSpawn(pid)
+            except BaseException:
+                killProcess(pid)
+                raise
+    except BaseException:
+        for fd in parentFds + childFds:
+            os.close(fd)
+        raise
+    for fd in childFds:
+        os.close(fd)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    watch = None if check is None else ProcessWatch(pid, check)
+    try:
+        output, killed = exchangeData(pid, stdinWriteFd, stdoutReadFd, inputContent or b"", deadline, watch)
+        if killed:
+            status, rusage, killedAfterOutput = waitProcess(pid, None)
+        else:
+            status, rusage, killedAfterOutput = waitProcess(pid, deadline, watch)
+    except BaseException:
+        killProcess(pid)
+        raise
+    return (os.waitstatus_to_exitcode(status), output if stdoutReadFd is not None else None, rusage, killed or killedAfterOutput)
 
 
 class CodeRunner:
@@ -13,8 +381,11 @@ class CodeRunner:
             returnCode: int | None,
             stdout: bytes | None,
             stderr: bytes | None,
+            cpuTime: float | None = None,
         ) -> None:
+            # totalTime is wall time, cpuTime is user+sys CPU time. Both in seconds.
             self.totalTime = totalTime
+            self.cpuTime = cpuTime
             self.timeOut = timeOut
             self.maxMemory = maxMemory
             self.memoryOut = memoryOut
@@ -24,11 +395,15 @@ class CodeRunner:
 
     def __init__(self):
         self.totalTime = None
+        self.cpuTime = None
         self.timeOut = False
         self.maxMemory = None
         self.memoryOut = False
 
+    # Fallback for platforms without wait4, e.g. Windows.
     def memoryMonitor(self, pid: int, timeLimit: float | None, memoryLimit: int | None) -> None:
+        import psutil
+
         try:
             psutilProcess = psutil.Process(pid)
             startTime = psutilProcess.create_time()
@@ -48,7 +423,126 @@ class CodeRunner:
         except psutil.NoSuchProcess:
             return
 
+    def applyLimits(self, pid: int, timeLimit: float | None) -> None:
+        if not KERNEL_LIMITS:
+            return
+        try:
+            if timeLimit is not None:
+                # A backstop behind the watch: SIGXCPU one second after the limit, SIGKILL one second later.
+                # CPU time counts from the start of the program, so setting it right after the spawn loses nothing.
+                cpuLimit = math.floor(timeLimit) + 1
+                resource.prlimit(pid, resource.RLIMIT_CPU, (cpuLimit, cpuLimit + 1))  # type: ignore
+        except (ProcessLookupError, OSError):
+            # The program has already exited.
+            pass
+
     def run(
+        self,
+        command: list,
+        inputContent: bytes | None = None,
+        inputFile: BinaryIO | None = None,
+        outputFile: BinaryIO | None = None,
+        timeLimit: float | None = None,
+        memoryLimit: int | None = None,
+        env: dict[str, str] | None = None,
+    ) -> Result:
+        """Runs the program on inputContent through a pipe, or on inputFile. Its output is returned, or written to outputFile."""
+        popenKwargs: dict[str, Any] = {
+            "stdin": subprocess.PIPE if inputFile is None else inputFile,
+            "stdout": subprocess.PIPE if outputFile is None else outputFile,
+            "stderr": subprocess.DEVNULL,
+            "env": env,
+        }
+        if not KERNEL_ACCOUNTING:
+            return self.runWithMonitor(command, inputContent=inputContent, timeLimit=timeLimit, memoryLimit=memoryLimit, **popenKwargs)
+
+        groupPath = CGROUP_BACKEND.create(memoryLimit) if CGROUP_BACKEND is not None else None
+        wallTimeLimit = None if timeLimit is None else timeLimit * WALL_TIME_LIMIT_FACTOR
+
+        memoryFloor = None
+
+        def onSpawn(pid: int) -> None:
+            nonlocal memoryFloor
+            memoryFloor = getPeakMemory()
+            if groupPath is not None:
+                try:
+                    CGROUP_BACKEND.attach(groupPath, pid)  # type: ignore
+                except OSError:
+                    pass
+            self.applyLimits(pid, timeLimit)
+
+        def check(pid: int) -> bool:
+            # The peak of the program itself, which wait4 cannot report below the floor. No address space limit is set,
+            # so large allocations succeed and end here as a memory limit verdict instead of failing inside the program.
+            cpuTime, peakMemory = readProcessUsage(pid)
+            if peakMemory is not None:
+                self.maxMemory = max(peakMemory, self.maxMemory or 0)
+            if memoryLimit is not None and self.maxMemory is not None and self.maxMemory > memoryLimit:
+                self.memoryOut = True
+                return True
+            if timeLimit is not None and cpuTime is not None and cpuTime > timeLimit:
+                self.timeOut = True
+                return True
+            return False
+
+        startTime = time.monotonic()
+        try:
+            if SPAWN_LAUNCHER:
+                returnCode, stdout, rusage, killed = launchProcess(
+                    command,
+                    env,
+                    inputContent=(inputContent or b"") if inputFile is None else None,
+                    inputFd=None if inputFile is None else inputFile.fileno(),
+                    outputFd=None if outputFile is None else outputFile.fileno(),
+                    timeout=wallTimeLimit,
+                    onSpawn=onSpawn,
+                    check=check,
+                )
+            else:
+                returnCode, stdout, rusage, killed = self.runWithPopen(command, inputContent, wallTimeLimit, onSpawn, popenKwargs)
+            self.totalTime = time.monotonic() - startTime
+            # Killed by the watch for memory, or at the wall time limit.
+            self.timeOut = self.timeOut or (killed and not self.memoryOut)
+            if rusage is not None:
+                self.cpuTime = rusage.ru_utime + rusage.ru_stime
+                # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+                maxMemory = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+                # At or below the floor, the peak may be ours rather than the program's, so the one seen by the watch is kept.
+                if memoryFloor is None or maxMemory > memoryFloor:
+                    self.maxMemory = max(maxMemory, self.maxMemory or 0)
+            if groupPath is not None:
+                peak, oomKilled = CGROUP_BACKEND.collect(groupPath)  # type: ignore
+                if peak is not None:
+                    self.maxMemory = max(peak, self.maxMemory or 0)
+                self.memoryOut = self.memoryOut or oomKilled
+        finally:
+            if groupPath is not None:
+                CGROUP_BACKEND.remove(groupPath)  # type: ignore
+
+        if timeLimit is not None and self.cpuTime is not None and self.cpuTime > timeLimit:
+            self.timeOut = True
+        if memoryLimit is not None and self.maxMemory is not None and self.maxMemory > memoryLimit:
+            self.memoryOut = True
+        return self.Result(self.totalTime, self.timeOut, self.maxMemory, self.memoryOut, returnCode, stdout, None, self.cpuTime)
+
+    def runWithPopen(
+        self, command: list, inputContent: bytes | None, wallTimeLimit: float | None, onSpawn: Callable[[int], None], popenKwargs: dict[str, Any]
+    ) -> tuple[int, bytes | None, Any, bool]:
+        killed = False
+        with SPAWN_LOCK:
+            resetPeakMemory()
+            process = RusagePopen(command, **popenKwargs)
+            onSpawn(process.pid)
+        with process:
+            try:
+                stdout, _ = process.communicate(inputContent, timeout=wallTimeLimit)
+            except subprocess.TimeoutExpired:
+                killed = True
+                process.kill()
+                stdout, _ = process.communicate()
+        return (process.returncode, stdout, process.rusage, killed)
+
+    def runWithMonitor(
         self,
         *popenargs,
         inputContent: bytes | None = None,
@@ -77,39 +571,87 @@ def compileCode(compileCommand: list) -> None:
         raise autohackRuntimeError(output, process.returncode)
 
 
-def generateInput(generateCommand: list) -> bytes:
+def runProgram(
+    command: list,
+    env: dict[str, str] | None = None,
+    inputContent: bytes | None = None,
+    inputFd: int | None = None,
+    outputFd: int | None = None,
+    captureOutput: bool = True,
+) -> tuple[int, bytes | None]:
+    """Runs a program without limits. The arguments are the same as for launchProcess. Returns the return code and the output."""
+    if SPAWN_LAUNCHER:
+        returnCode, output, _, _ = launchProcess(command, env, inputContent, inputFd, outputFd, captureOutput)
+        return (returnCode, output)
+    stdout = outputFd if outputFd is not None else subprocess.PIPE if captureOutput else subprocess.DEVNULL
+    stdin = subprocess.PIPE if inputContent is not None else inputFd
+    process = subprocess.Popen(command, stdin=stdin, stdout=stdout, stderr=subprocess.DEVNULL, env=env)
+    output = process.communicate(inputContent)[0]
+    return (process.returncode, output)
+
+
+def generateInput(generateCommand: list, env: dict[str, str] | None = None) -> bytes:
     try:
-        process = subprocess.Popen(generateCommand, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        returnCode, dataInput = runProgram(generateCommand, env)
     except OSError:
         return b""
-    dataInput = process.communicate()[0]
-    if process.returncode != 0:
-        raise autohackRuntimeError(dataInput, process.returncode)
-    return dataInput
+    if returnCode != 0:
+        raise autohackRuntimeError(dataInput or b"", returnCode)
+    return dataInput or b""
 
 
-def generateAnswer(generateCommand: list, dataInput: bytes) -> bytes:
+def generateAnswer(generateCommand: list, dataInput: bytes, env: dict[str, str] | None = None) -> bytes:
     try:
-        process = subprocess.Popen(generateCommand, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        returnCode, dataAnswer = runProgram(generateCommand, env, inputContent=dataInput)
     except OSError:
         return b""
-    dataAnswer = process.communicate(dataInput)[0]
-    if process.returncode != 0:
-        raise autohackRuntimeError(dataAnswer, process.returncode)
-    return dataAnswer
+    if returnCode != 0:
+        raise autohackRuntimeError(dataAnswer or b"", returnCode)
+    return dataAnswer or b""
+
+
+def generateInputToFile(generateCommand: list, inputFilePath: pathlib.Path, env: dict[str, str] | None = None) -> None:
+    with open(inputFilePath, "wb") as inputFile:
+        try:
+            returnCode, _ = runProgram(generateCommand, env, outputFd=inputFile.fileno())
+        except OSError:
+            return
+    if returnCode != 0:
+        raise autohackRuntimeError(open(inputFilePath, "rb").read(), returnCode)
+
+
+def generateAnswerToFile(generateCommand: list, inputFilePath: pathlib.Path, answerFilePath: pathlib.Path, env: dict[str, str] | None = None) -> None:
+    with open(inputFilePath, "rb") as inputFile, open(answerFilePath, "wb") as answerFile:
+        try:
+            returnCode, _ = runProgram(generateCommand, env, inputFd=inputFile.fileno(), outputFd=answerFile.fileno())
+        except OSError:
+            return
+    if returnCode != 0:
+        raise autohackRuntimeError(open(answerFilePath, "rb").read(), returnCode)
+
+
+def runSourceCodeWithFiles(
+    runCommand: list,
+    inputFilePath: pathlib.Path,
+    outputFilePath: pathlib.Path,
+    timeLimit: float | None,
+    memoryLimit: int | None,
+    env: dict[str, str] | None = None,
+) -> CodeRunner.Result:
+    """Like runSourceCode, but the program reads its input from and writes its output to files. stdout in the result is None."""
+    with open(inputFilePath, "rb") as inputFile, open(outputFilePath, "wb") as outputFile:
+        try:
+            result = CodeRunner().run(runCommand, inputFile=inputFile, outputFile=outputFile, timeLimit=timeLimit, memoryLimit=memoryLimit, env=env)
+        except OSError:
+            return CodeRunner.Result(None, False, None, False, 0, None, b"")
+    return result
 
 
-def runSourceCode(runCommand: list, dataInput: bytes, timeLimit: float | None, memoryLimit: int | None) -> CodeRunner.Result:
+def runSourceCode(
+    runCommand: list, dataInput: bytes, timeLimit: float | None, memoryLimit: int | None, env: dict[str, str] | None = None
+) -> CodeRunner.Result:
     try:
-        result = CodeRunner().run(
-            runCommand,
-            inputContent=dataInput,
-            timeLimit=timeLimit,
-            memoryLimit=memoryLimit,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-        )
+        result = CodeRunner().run(runCommand, inputContent=dataInput, timeLimit=timeLimit, memoryLimit=memoryLimit, env=env)
     except OSError:
         return CodeRunner.Result(None, False, None, False, 0, b"", b"")
     return result
@@ -1,6 +1,17 @@
 from autohack.lib.i18n import *
 from typing import Callable
-import readchar, inspect, pathlib, time, sys, os
+import threading, pathlib, mmap, time, sys, os
+
+# Worker threads share the terminal with the main thread.
+OUTPUT_LOCK = threading.RLock()
+
+# Headless runs draw nothing: messages go to stderr one per line, without colours or cursor movement, and stdout is left to the results.
+HEADLESS = False
+
+
+def setHeadless(headless: bool) -> None:
+    global HEADLESS
+    HEADLESS = headless
 
 
 def ensureDirExists(dirPath: pathlib.Path) -> None:
@@ -30,16 +41,35 @@ def readData(filePath: pathlib.Path) -> bytes:
     return open(filePath, "rb").read()
 
 
+def mapData(filePath: pathlib.Path) -> mmap.mmap | None:
+    """Maps a file read-only. Returns None for empty files, which cannot be mapped."""
+    with open(filePath, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# Seeds stay below this, so that generators reading them into a 32-bit int with atoi or stoi do not overflow.
+SEED_LIMIT = 1 << 31
+
+
+def fillSeed(command: list, seed: int) -> list:
+    return [arg.replace("$(seed)", str(seed)) if isinstance(arg, str) else arg for arg in command]
+
+
 def clearLine() -> None:
-    write("\x1b[2K\r")
+    if not HEADLESS:
+        write("\x1b[2K\r")
 
 
 def prevLine() -> None:
-    write("\x1b[1A")
+    if not HEADLESS:
+        write("\x1b[1A")
 
 
 def outputEndl(count: int = 1) -> None:
-    sys.stdout.write("\n" * count)
+    if not HEADLESS:
+        sys.stdout.write("\n" * count)
 
 
 def inputMessage(prompt: str = "", endl: int = 0, clear: bool = False) -> str:
@@ -52,13 +82,19 @@ def inputMessage(prompt: str = "", endl: int = 0, clear: bool = False) -> str:
 
 
 def write(message: str, endl: int = 0, clear: bool = False, highlight: bool = False) -> None:
-    if clear:
-        clearLine()
-    if highlight:
-        message = highlightText(message)
-    sys.stdout.write(message)
-    outputEndl(endl)
-    sys.stdout.flush()
+    with OUTPUT_LOCK:
+        if HEADLESS:
+            if message != "":
+                sys.stderr.write(f"{message}\n")
+                sys.stderr.flush()
+            return
+        if clear:
+            clearLine()
+        if highlight:
+            message = highlightText(message)
+        sys.stdout.write(message)
+        outputEndl(endl)
+        sys.stdout.flush()
 
 
 def getTranslatedMessage(I18n: I18N, message: str, *args, language: str = "") -> str:
@@ -79,11 +115,13 @@ def writeMessage(
 
 def hideCursor() -> None:
     # https://www.cnblogs.com/chargedcreeper/p/-/ANSI
-    write("\x1b[?25l")
+    if not HEADLESS:
+        write("\x1b[?25l")
 
 
 def showCursor() -> None:
-    write("\x1b[?25h")
+    if not HEADLESS:
+        write("\x1b[?25h")
 
 
 def highlightText(message: str) -> str:
@@ -97,6 +135,8 @@ def exitProgram(exitCode: int = 0, pure: bool = False) -> None:
 
 
 def getFunctionInfo(func: Callable) -> tuple[list[type], type]:
+    import inspect
+
     sig = inspect.signature(func)
     params = sig.parameters
     paramTypes = [param.annotation for param in params.values()]
@@ -116,6 +156,9 @@ def getFolderSize(folderPath: pathlib.Path) -> int:
 
 
 def selectionMenu(selectionList: list[str]) -> int:
+    # Only needed on the first start, and slow to import.
+    import readchar
+
     currentSelection = 0
     write("Use Up/Down arrows to navigate, Enter to select.", 1)
 
@@ -1,6 +1,7 @@
 from autohack.core.util import *
+from autohack.lib.jsoncache import *
 from typing import Any
-import logging, pathlib, json5, os
+import logging, pathlib, os
 
 
 class Config:
@@ -11,11 +12,15 @@ class Config:
         logger: logging.Logger,
         configValidationExclude: list[str] = [],
         messageOnCreate: str | None = None,
+        cacheFolderPath: pathlib.Path | None = None,
     ) -> None:
         self.defaultConfig = defaultConfig
         self.configValidationExclude = configValidationExclude
         self.configFilePath = configFilePath
+        self.cacheFolderPath = cacheFolderPath
         self.logger = logger
+        # Entries already looked up, by their dotted names.
+        self.entries: dict[str, Any] = {}
         self.logger.info(f'[config] Config file path: "{self.configFilePath}"')
         configFileExists = self.configFileExists()
         self.config = self.loadConfig()
@@ -29,10 +34,10 @@ class Config:
     def loadConfig(self) -> dict[str, Any]:
         if not os.path.exists(self.configFilePath):
             ensureDirExists(self.configFilePath.parent)
-            json5.dump(self.defaultConfig, open(self.configFilePath, "w", encoding="utf-8"), indent=4, quote_keys=True, trailing_commas=False)
+            dumpJSON5(self.configFilePath, self.defaultConfig, self.cacheFolderPath)
             self.logger.info("[config] Config file created.")
 
-        config = json5.load(open(self.configFilePath, "r", encoding="utf-8"))
+        config = loadJSON5(self.configFilePath, self.cacheFolderPath)
 
         # if self.defaultConfig["_version"] > config.get("_version", 0):
         #     mergedConfig = self.mergeConfigs(config, self.defaultConfig)
@@ -43,7 +48,10 @@ class Config:
         #     config = mergedConfig
 
         mergedConfig = self.mergeConfigs(config, self.defaultConfig, self.configValidationExclude, "")
-        json5.dump(mergedConfig, open(self.configFilePath, "w", encoding="utf-8"), indent=4, quote_keys=True, trailing_commas=False)
+        # Only rewritten when entries were added, removed or reset, which keeps the file and its cache untouched otherwise.
+        if mergedConfig != config:
+            dumpJSON5(self.configFilePath, mergedConfig, self.cacheFolderPath)
+            self.logger.info("[config] Config file updated.")
         config = mergedConfig
 
         self.logger.info("[config] Config file loaded.")
@@ -71,6 +79,8 @@ class Config:
         return merged
 
     def getConfigEntry(self, entryName: str) -> Any:
+        if entryName in self.entries:
+            return self.entries[entryName]
         entryTree = entryName.split(".")
         result = self.config
 
@@ -80,6 +90,7 @@ class Config:
                 break
 
         self.logger.debug(f'[config] Get config entry: "{entryName}" = "{result}"')
+        self.entries[entryName] = result
         return result
 
     def modifyConfigEntry(self, entryName: str, newValue: Any) -> bool:
@@ -96,6 +107,7 @@ class Config:
             return False
         currentLevel[lastLevel] = newValue
 
-        json5.dump(self.config, open(self.configFilePath, "w", encoding="utf-8"), indent=4, quote_keys=True, trailing_commas=False)
+        self.entries.clear()
+        dumpJSON5(self.configFilePath, self.config, self.cacheFolderPath)
         self.logger.debug(f'[config] Modify entry: "{entryName}" = "{newValue}"')
         return True
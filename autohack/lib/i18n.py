@@ -1,5 +1,6 @@
 from autohack.core.constant import *
-import logging, pathlib, json5, os
+from autohack.lib.jsoncache import *
+import logging, pathlib, os
 
 
 class I18N:
@@ -7,8 +8,10 @@ class I18N:
         self,
         translationFileDir: pathlib.Path,
         logger: logging.Logger,
+        cacheFolderPath: pathlib.Path | None = None,
     ) -> None:
         self.translationFileDir = translationFileDir
+        self.cacheFolderPath = cacheFolderPath
         self.logger = logger
         self.translations = {}
         self.setDefaultLanguage(LOGGER_LANGUAGE_ID)
@@ -28,7 +31,7 @@ class I18N:
         if not os.path.exists(filePath):
             self.logger.critical("[i18n] Translation file not found.")
             raise FileNotFoundError(f"Translation file {filePath} not found.")
-        translations = json5.load(open(filePath, "r", encoding="utf-8"))
+        translations = loadJSON5(filePath, self.cacheFolderPath)
 
         self.logger.info("[i18n] Translation file loaded.")
         return translations
@@ -0,0 +1,52 @@
+from typing import Any
+import hashlib, pathlib, json, os
+
+
+def getCacheFilePath(filePath: pathlib.Path, cacheFolderPath: pathlib.Path) -> pathlib.Path:
+    return cacheFolderPath / f"{hashlib.sha1(str(filePath.resolve()).encode()).hexdigest()}.json"
+
+
+def getFileKey(filePath: pathlib.Path) -> list[int]:
+    fileStat = os.stat(filePath)
+    return [fileStat.st_mtime_ns, fileStat.st_size]
+
+
+def storeCache(filePath: pathlib.Path, data: Any, cacheFolderPath: pathlib.Path) -> None:
+    try:
+        cacheFilePath = getCacheFilePath(filePath, cacheFolderPath)
+        cacheFolderPath.mkdir(parents=True, exist_ok=True)
+        temporaryPath = cacheFilePath.with_name(f".{cacheFilePath.name}.{os.getpid()}")
+        temporaryPath.write_text(json.dumps({"key": getFileKey(filePath), "data": data}), encoding="utf-8")
+        os.replace(temporaryPath, cacheFilePath)
+    except OSError:
+        pass
+
+
+def loadJSON5(filePath: pathlib.Path, cacheFolderPath: pathlib.Path | None = None) -> Any:
+    """
+    Parses a JSON5 file. json5 is a slow pure-Python parser, so the result is also kept as plain JSON in the cache folder,
+    and read from there while the modification time and size of the file stay the same.
+    """
+    if cacheFolderPath is not None:
+        try:
+            cached = json.loads(getCacheFilePath(filePath, cacheFolderPath).read_bytes())
+            if cached["key"] == getFileKey(filePath):
+                return cached["data"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    import json5
+
+    data = json5.loads(filePath.read_text(encoding="utf-8"))
+    if cacheFolderPath is not None:
+        storeCache(filePath, data, cacheFolderPath)
+    return data
+
+
+def dumpJSON5(filePath: pathlib.Path, data: Any, cacheFolderPath: pathlib.Path | None = None) -> None:
+    """Writes a JSON5 file and updates its cache, so the next load does not parse it again."""
+    import json5
+
+    with open(filePath, "w", encoding="utf-8") as file:
+        json5.dump(data, file, indent=4, quote_keys=True, trailing_commas=False)
+    if cacheFolderPath is not None:
+        storeCache(filePath, data, cacheFolderPath)
@@ -1,5 +1,37 @@
 from autohack.core.util import *
-import logging, pathlib, time
+import logging.handlers, logging, pathlib, atexit, queue, time
+
+# Records written to the log file between two flushes at most.
+LOG_BATCH_SIZE = 256
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records as they are. QueueHandler formats the message in the calling thread; here the listener thread does."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class BatchFileHandler(logging.FileHandler):
+    """Writes the records of the listener thread, flushing once the queue runs empty or every LOG_BATCH_SIZE records, not after each record."""
+
+    def __init__(self, filePath: pathlib.Path, recordQueue: queue.SimpleQueue) -> None:
+        super().__init__(filePath, encoding="utf-8")
+        self.recordQueue = recordQueue
+        self.pendingRecords = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        self.pendingRecords += 1
+        if self.pendingRecords >= LOG_BATCH_SIZE or self.recordQueue.empty():
+            self.flush()
+            self.pendingRecords = 0
 
 
 class Logger:
@@ -19,16 +51,31 @@ class Logger:
 
         self.logFilePath = self.logFolder / f"autohack-{formatTime(logTime)}.log"
 
-        logFile = logging.FileHandler(self.logFilePath, encoding="utf-8")
+        # The calling thread only queues the record; the listener thread formats it and writes the file in batches.
+        recordQueue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        logFile = BatchFileHandler(self.logFilePath, recordQueue)
         logFile.setLevel(logLevel)
         logFile.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] - %(message)s"))
 
-        self.logger.addHandler(logFile)
+        self.listener = logging.handlers.QueueListener(recordQueue, logFile)
+        self.listener.start()
+        self.stopped = False
+        atexit.register(self.stop)
+
+        self.logger.addHandler(DeferredQueueHandler(recordQueue))
 
         self.logger.info(f'[logger] Log file: "{self.logFilePath}"')
         self.logger.info(f"[logger] Log level: {logging.getLevelName(logLevel)}")
         self.logger.info("[logger] Logger initialized.")
 
+    def stop(self) -> None:
+        """Writes the records still queued and closes the log file."""
+        if not self.stopped:
+            self.stopped = True
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+
     def getLogger(self) -> logging.Logger:
         return self.logger
 
@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of the builtin_basic checker against the previous implementation, which decoded both texts and split them into lines.
+
+Run from the repository root:
+
+    python benchmarks/checker_basic.py
+"""
+
+import pathlib, timeit, sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+
+from autohack.core.checker import builtinBasicCheckerActivate
+
+
+def previousBasicChecker(input: bytes, output: bytes, answer: bytes, args: dict) -> tuple[bool, str]:
+    outputStr = output.decode().rstrip("\n")
+    answerStr = answer.decode().rstrip("\n")
+    outputLines = outputStr.splitlines()
+    answerLines = answerStr.splitlines()
+    if len(outputLines) != len(answerLines):
+        return (False, "Output and answer have different number of lines.")
+    for i in range(len(outputLines)):
+        if outputLines[i].rstrip() != answerLines[i].rstrip():
+            return (False, f"Line {i + 1} does not match.")
+    return (True, "Output matches the answer.")
+
+
+def main() -> None:
+    answer = b"".join(f"{i} {i * 7 % 1000003}\n".encode() for i in range(500000))
+    cases = {
+        "identical": bytes(bytearray(answer)),
+        "trailing spaces": answer.replace(b"\n", b" \n"),
+        "differs on last line": answer[:-2] + b"x\n",
+    }
+    currentBasicChecker = builtinBasicCheckerActivate({})
+    print(f"answer size: {len(answer) / 1024 / 1024:.2f} MB")
+    for name, output in cases.items():
+        for label, checker in (("previous", previousBasicChecker), ("current", currentBasicChecker)):
+            seconds = min(timeit.repeat(lambda: checker(b"", output, answer, {}), number=1, repeat=5))
+            print(f"{name:>22} {label:>8}: {seconds * 1000:9.2f} ms  {checker(b'', output, answer, {})[1]}")
+
+
+if __name__ == "__main__":
+    main()
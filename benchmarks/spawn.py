@@ -0,0 +1,72 @@
+"""
+Spawns per second of the process launchers in autohack.core.run: the posix_spawn launcher against the previous Popen path.
+A tiny C program that copies its input to its output is built in a temporary folder and run repeatedly.
+
+Run from the repository root:
+
+    python benchmarks/spawn.py [runs]
+
+On a single-core Linux 6.18 VM with Python 3.13 (1000 runs):
+
+                       runSourceCode (Popen):      454 spawns/s    2202.0 us/spawn
+                      generateAnswer (Popen):     1058 spawns/s     945.0 us/spawn
+                 runSourceCode (posix_spawn):      991 spawns/s    1009.1 us/spawn
+                generateAnswer (posix_spawn):     1034 spawns/s     967.2 us/spawn
+
+Most of the difference for runSourceCode is Popen.wait with a timeout, which polls with sleeps; the launcher waits on a pidfd.
+generateAnswer already used posix_spawn through Popen when the program path contains a slash.
+"""
+
+import subprocess, tempfile, pathlib, time, sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+
+import autohack.core.run as run
+
+ECHO_SOURCE = r"""
+#include <stdio.h>
+int main(void) {
+    char buffer[1 << 16];
+    size_t size;
+    while ((size = fread(buffer, 1, sizeof(buffer), stdin)) > 0)
+        fwrite(buffer, 1, size, stdout);
+    return 0;
+}
+"""
+
+
+def measure(label: str, task, runs: int) -> None:
+    # One warm-up run, then the best of three rounds.
+    task()
+    best = min(timeIt(task, runs) for _ in range(3))
+    print(f"{label:>40}: {runs / best:8.0f} spawns/s  {best / runs * 1e6:8.1f} us/spawn")
+
+
+def timeIt(task, runs: int) -> float:
+    startTime = time.perf_counter()
+    for _ in range(runs):
+        task()
+    return time.perf_counter() - startTime
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as folder:
+        sourcePath, programPath = pathlib.Path(folder) / "echo.c", pathlib.Path(folder) / "echo"
+        sourcePath.write_text(ECHO_SOURCE)
+        subprocess.run(["cc", "-O2", "-o", str(programPath), str(sourcePath)], check=True)
+        command = [str(programPath)]
+        dataInput = b"1 2\n" * 16
+
+        spawnAvailable = run.SPAWN_LAUNCHER
+        for launcher, label in ((False, "Popen"), (True, "posix_spawn")):
+            if launcher and not spawnAvailable:
+                print(f"{label:>40}: not available on this platform")
+                continue
+            run.SPAWN_LAUNCHER = launcher
+            measure(f"runSourceCode ({label})", lambda: run.runSourceCode(command, dataInput, 1.0, 256 * 1024 * 1024), runs)
+            measure(f"generateAnswer ({label})", lambda: run.generateAnswer(command, dataInput), runs)
+
+
+if __name__ == "__main__":
+    main()
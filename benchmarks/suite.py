@@ -0,0 +1,354 @@
+"""
+Benchmark suite for the harness hot path: process launching, the worker pipeline and the built-in checkers.
+Stand-in generator, std and source programs are built with the C compiler in a temporary folder,
+which is also the working directory, so nothing is written to the repository.
+
+Run from the repository root:
+
+    python benchmarks/suite.py [--quick] [--output results.json] [--testlib path/to/testlib.h]
+
+Results are printed as a table and written as JSON, which can be compared between commits:
+
+    python benchmarks/suite.py --compare before.json after.json
+
+builtin_testlib is only measured when testlib.h is given with --testlib or found in the current directory.
+"""
+
+import subprocess, argparse, platform, tempfile, pathlib, shutil, json, time, sys, os
+
+REPOSITORY_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPOSITORY_PATH))
+
+# Bump when the meaning of a result changes, so that old results are not compared with new ones.
+SCHEMA_VERSION = 1
+
+PROGRAMS = {
+    # Prints a small two-number case, different for every seed.
+    "generator": r"""
+#include <stdio.h>
+#include <stdlib.h>
+int main(int argc, char **argv) {
+    unsigned seed = argc > 1 ? (unsigned)atoi(argv[1]) : 1;
+    seed = seed * 1103515245u + 12345u;
+    printf("%u %u\n", seed % 1000u, (seed >> 16) % 1000u);
+    return 0;
+}
+""",
+    # Copies its input to its output.
+    "echo": r"""
+#include <stdio.h>
+int main(void) {
+    char buffer[1 << 16];
+    size_t size;
+    while ((size = fread(buffer, 1, sizeof(buffer), stdin)) > 0)
+        fwrite(buffer, 1, size, stdout);
+    return 0;
+}
+""",
+    # Burns about 50 ms of CPU time.
+    "cpu": r"""
+#include <stdio.h>
+#include <time.h>
+int main(void) {
+    volatile unsigned long counter = 0;
+    clock_t start = clock();
+    while (clock() - start < CLOCKS_PER_SEC / 20)
+        counter++;
+    printf("%lu\n", counter > 0 ? 1ul : 0ul);
+    return 0;
+}
+""",
+    # Touches 128 MiB.
+    "memory": r"""
+#include <stdlib.h>
+#include <string.h>
+#include <stdio.h>
+int main(void) {
+    size_t size = 128u << 20;
+    unsigned long sum = 0;
+    char *buffer = malloc(size);
+    if (buffer == NULL)
+        return 1;
+    memset(buffer, 1, size);
+    /* Reading every page back keeps the compiler from dropping the buffer. */
+    for (size_t i = 0; i < size; i += 4096)
+        sum += buffer[i];
+    printf("%lu\n", sum);
+    free(buffer);
+    return 0;
+}
+""",
+    # Prints 64 MiB of lines.
+    "output": r"""
+#include <stdio.h>
+int main(void) {
+    static char line[64];
+    for (int i = 0; i < 63; i++)
+        line[i] = 'a' + i % 26;
+    line[63] = '\n';
+    for (int i = 0; i < (64 << 20) / 64; i++)
+        fwrite(line, 1, 64, stdout);
+    return 0;
+}
+""",
+    # Never exits on its own.
+    "hang": r"""
+#include <unistd.h>
+int main(void) {
+    for (;;)
+        pause();
+}
+""",
+}
+
+TESTLIB_CHECKER = r"""
+#include "testlib.h"
+int main(int argc, char *argv[]) {
+    registerTestlibCmd(argc, argv);
+    while (!ans.seekEof()) {
+        std::string expected = ans.readToken();
+        std::string found = ouf.readToken();
+        if (expected != found)
+            quitf(_wa, "expected %s, found %s", expected.c_str(), found.c_str());
+    }
+    quitf(_ok, "ok");
+}
+"""
+
+
+class LatencyRecorder:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        result = {}
+        for stage, samples in self.samples.items():
+            samples = sorted(samples)
+            result[stage] = {
+                "count": len(samples),
+                "mean_ms": sum(samples) / len(samples) * 1000,
+                "p50_ms": samples[len(samples) // 2] * 1000,
+                "p95_ms": samples[min(len(samples) - 1, len(samples) * 95 // 100)] * 1000,
+                "max_ms": samples[-1] * 1000,
+            }
+        return result
+
+
+def buildPrograms(folderPath: pathlib.Path) -> dict[str, list[str]]:
+    commands = {}
+    for name, source in PROGRAMS.items():
+        sourcePath = folderPath / f"{name}.c"
+        sourcePath.write_text(source)
+        subprocess.run(["cc", "-O2", "-o", str(folderPath / name), str(sourcePath)], check=True)
+        commands[name] = [str(folderPath / name)]
+    return commands
+
+
+def benchmarkPipeline(commands: dict[str, list[str]], cases: int, workerCount: int) -> dict:
+    """Generator, std, source and builtin_basic on small cases through the worker pool, as in the main loop."""
+    from autohack.core.checker import builtinBasicCheckerActivate
+    from autohack.core.pool import HackWorkerPool, HackData
+    from autohack.core.run import generateInput, generateAnswer, runSourceCode
+
+    checker = builtinBasicCheckerActivate({})
+    latencies = LatencyRecorder()
+
+    def timed(stage: str, task):
+        startTime = time.perf_counter()
+        result = task()
+        latencies.add(stage, time.perf_counter() - startTime)
+        return result
+
+    def prepareData(workerID: int, dataID: int) -> HackData:
+        data = HackData(dataID, workerID)
+        data.input = timed("generator", lambda: generateInput(commands["generator"] + [str(dataID)]))
+        data.answer = timed("std", lambda: generateAnswer(commands["echo"], data.input))
+        return data
+
+    def judgeData(workerID: int, data: HackData) -> HackData:
+        data.result = timed("source", lambda: runSourceCode(commands["echo"], data.input, 1.0, 256 * 1024 * 1024))
+        data.checkerResult = timed("checker", lambda: checker(data.input, data.result.stdout, data.answer, {}))  # type: ignore
+        return data
+
+    startTime, startCPUTime = time.perf_counter(), time.process_time()
+    pool = HackWorkerPool(workerCount, prepareData, judgeData, cases)
+    pool.start()
+    failed = sum(1 for _, data in pool.results() if data.checkerResult is None or not data.checkerResult[0])
+    pool.stop()
+    elapsed, cpuTime = time.perf_counter() - startTime, time.process_time() - startCPUTime
+    return {
+        "cases": cases,
+        "workers": workerCount,
+        "failed": failed,
+        "cases_per_second": cases / elapsed,
+        # CPU time of the harness itself (all its threads, not the programs) per case.
+        "harness_cpu_ms_per_case": cpuTime / cases * 1000,
+        "stages": latencies.summary(),
+    }
+
+
+def benchmarkRunner(commands: dict[str, list[str]], repeat: int) -> dict:
+    """Verdicts and costs of CodeRunner on programs that burn CPU, use too much memory, print a lot or hang."""
+    from autohack.core.run import runSourceCode
+
+    scenarios = {
+        "cpu": (commands["cpu"], 1.0, 256 << 20),
+        "memory": (commands["memory"], 1.0, 96 << 20),
+        "output": (commands["output"], 5.0, 256 << 20),
+        "hang": (commands["hang"], 0.2, 256 << 20),
+    }
+    results = {}
+    for name, (command, timeLimit, memoryLimit) in scenarios.items():
+        latencies = LatencyRecorder()
+        result = None
+        for _ in range(repeat):
+            startTime, startCPUTime = time.perf_counter(), time.process_time()
+            result = runSourceCode(command, b"", timeLimit, memoryLimit)
+            latencies.add("wall", time.perf_counter() - startTime)
+            latencies.add("harness_cpu", time.process_time() - startCPUTime)
+        assert result is not None
+        entry = {
+            "time_limit_ms": timeLimit * 1000,
+            "verdict": "TLE" if result.timeOut else "MLE" if result.memoryOut else "RE" if result.returnCode != 0 else "OK",
+            "program_cpu_ms": None if result.cpuTime is None else result.cpuTime * 1000,
+            "max_memory_mib": None if result.maxMemory is None else result.maxMemory / 1024 / 1024,
+            **latencies.summary(),
+        }
+        if name == "output" and result.stdout is not None:
+            entry["output_mib_per_second"] = len(result.stdout) / 1024 / 1024 / (entry["wall"]["p50_ms"] / 1000)
+        results[name] = entry
+    return results
+
+
+def benchmarkCheckers(testlibHeaderPath: pathlib.Path | None, repeat: int) -> dict:
+    from autohack.core.checker import builtinBasicCheckerActivate, builtinTestlibCheckerActivate, builtinTestlibCheckerDeactivate
+    from autohack.core.checker import checkerType, deactivateType
+    from autohack.core.exception import autohackRuntimeError
+
+    answer = b"".join(f"{i} {i * 7 % 1000003}\n".encode() for i in range(1000000))
+    cases = {
+        "identical": bytes(bytearray(answer)),
+        "trailing_spaces": answer.replace(b"\n", b" \n"),
+        "last_line_differs": answer[:-2] + b"x\n",
+    }
+    checkers: dict[str, tuple[checkerType, deactivateType | None]] = {"builtin_basic": (builtinBasicCheckerActivate({}), None)}
+    results: dict = {"answer_mib": len(answer) / 1024 / 1024}
+    if testlibHeaderPath is None:
+        results["builtin_testlib"] = {"skipped": "testlib.h not found"}
+    else:
+        shutil.copy(testlibHeaderPath, "testlib.h")
+        pathlib.Path("checker.cpp").write_text(TESTLIB_CHECKER)
+        try:
+            checkers["builtin_testlib"] = (builtinTestlibCheckerActivate({"compile_args": ["-O2"]}), builtinTestlibCheckerDeactivate)
+        except autohackRuntimeError as e:
+            results["builtin_testlib"] = {"skipped": f"checker compilation failed: {e.output.decode(errors='ignore')[:200]}"}
+
+    for checkerName, (checker, deactivate) in checkers.items():
+        results[checkerName] = {}
+        for caseName, output in cases.items():
+            seconds = []
+            for _ in range(repeat):
+                startTime = time.perf_counter()
+                checker(b"", output, answer, {})
+                seconds.append(time.perf_counter() - startTime)
+            best = min(seconds)
+            results[checkerName][caseName] = {"best_ms": best * 1000, "mib_per_second": len(answer) / 1024 / 1024 / best}
+        # A small case shows the fixed cost of a check.
+        seconds = []
+        for _ in range(repeat * 20):
+            startTime = time.perf_counter()
+            checker(b"1 2\n", b"3\n", b"3\n", {})
+            seconds.append(time.perf_counter() - startTime)
+        results[checkerName]["small_case"] = {"best_ms": min(seconds) * 1000}
+        if deactivate is not None:
+            deactivate({})
+    return results
+
+
+def getCommit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPOSITORY_PATH, capture_output=True, check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(prefix: str, value, result: dict) -> dict:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flatten(f"{prefix}.{key}" if prefix else key, item, result)
+    elif value is not None:
+        result[prefix] = value
+    return result
+
+
+def isNumber(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def compareResults(beforePath: pathlib.Path, afterPath: pathlib.Path) -> None:
+    before, after = json.loads(beforePath.read_text()), json.loads(afterPath.read_text())
+    if before.get("schema") != after.get("schema"):
+        print("Warning: the results were written by different versions of the suite.")
+    beforeValues, afterValues = flatten("", before["results"], {}), flatten("", after["results"], {})
+    print(f"{'metric':<60} {'before':>12} {'after':>12} {'change':>8}")
+    for key in beforeValues:
+        if key not in afterValues or key.endswith(".count"):
+            continue
+        if not isNumber(beforeValues[key]) or not isNumber(afterValues[key]):
+            print(f"{key:<60} {str(beforeValues[key]):>12} {str(afterValues[key]):>12}")
+            continue
+        change = f"{(afterValues[key] / beforeValues[key] - 1) * 100:+7.1f}%" if beforeValues[key] else ""
+        print(f"{key:<60} {beforeValues[key]:>12.3f} {afterValues[key]:>12.3f} {change:>8}")
+
+
+def main() -> None:
+    argsParser = argparse.ArgumentParser(description="Benchmarks of the autohack harness hot path")
+    argsParser.add_argument("--quick", action="store_true", help="Fewer cases and repetitions")
+    argsParser.add_argument("--workers", type=int, default=1, help="Workers of the pipeline benchmark")
+    argsParser.add_argument("--output", type=pathlib.Path, help="Write the results to this JSON file")
+    argsParser.add_argument("--testlib", type=pathlib.Path, help="testlib.h, to benchmark builtin_testlib")
+    argsParser.add_argument("--compare", type=pathlib.Path, nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files")
+    args = argsParser.parse_args()
+
+    if args.compare:
+        compareResults(*args.compare)
+        return
+
+    testlibHeaderPath = args.testlib or (pathlib.Path("testlib.h") if pathlib.Path("testlib.h").is_file() else None)
+    testlibHeaderPath = None if testlibHeaderPath is None else testlibHeaderPath.resolve()
+    outputPath = None if args.output is None else args.output.resolve()
+    cases, repeat = (200, 3) if args.quick else (1000, 10)
+
+    with tempfile.TemporaryDirectory(prefix="autohack-benchmark-") as folder:
+        # autohack resolves its data folder from the working directory when it is imported.
+        os.chdir(folder)
+        commands = buildPrograms(pathlib.Path(folder))
+        results = {
+            "pipeline": benchmarkPipeline(commands, cases, args.workers),
+            "runner": benchmarkRunner(commands, repeat),
+            "checkers": benchmarkCheckers(testlibHeaderPath, repeat),
+        }
+        os.chdir(REPOSITORY_PATH)
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "commit": getCommit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    for key, value in flatten("", results, {}).items():
+        if not key.endswith(".count"):
+            print(f"{key:<60} {value:>12.3f}" if isNumber(value) else f"{key:<60} {value:>12}")
+    if outputPath is not None:
+        outputPath.write_text(json.dumps(report, indent=4))
+        print(f"Results written to {outputPath}")
+
+
+if __name__ == "__main__":
+    main()